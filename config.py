@@ -7,6 +7,7 @@ and system settings.
 """
 
 import os
+from types import MappingProxyType
 
 # Project Structure
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -21,46 +22,62 @@ TESTS_DIR = os.path.join(PROJECT_ROOT, "tests")
 # Database Configuration
 DATABASE_PATH = os.path.join(DATA_DIR, "shazam_clone.db")
 
-# Audio processing settings
-AUDIO_CONFIG = {
-    'default_sample_rate': 22050,
-    'fft_size': 2048,
-    'hop_length': 512,
-    'db_floor': -80
-}
+# Audio processing settings (scalars are exposed directly for hot paths,
+# the read-only dicts are kept for grouped access)
+SAMPLE_RATE = 22050
+FFT_SIZE = 2048
+HOP_LENGTH = 512
+DB_FLOOR = -80
+USE_GPU = False  # Opt-in: spectrograms on CUDA when PyTorch with CUDA is installed
+
+AUDIO_CONFIG = MappingProxyType({
+    'default_sample_rate': SAMPLE_RATE,
+    'fft_size': FFT_SIZE,
+    'hop_length': HOP_LENGTH,
+    'db_floor': DB_FLOOR
+})
 
 # Peak detection settings
-PEAK_CONFIG = {
-    'neighborhood_size': (20, 20),
-    'threshold_db': -50
-}
+PEAK_NEIGHBORHOOD_SIZE = (20, 20)
+PEAK_THRESHOLD_DB = -50
+
+PEAK_CONFIG = MappingProxyType({
+    'neighborhood_size': PEAK_NEIGHBORHOOD_SIZE,
+    'threshold_db': PEAK_THRESHOLD_DB
+})
 
 # Fingerprinting settings
-FINGERPRINT_CONFIG = {
-    'fan_value': 5,
-    'target_zone': (1, 20)  # (min_delta_t, max_delta_t)
-}
+FAN_VALUE = 5
+TARGET_ZONE = (1, 20)  # (min_delta_t, max_delta_t)
+
+FINGERPRINT_CONFIG = MappingProxyType({
+    'fan_value': FAN_VALUE,
+    'target_zone': TARGET_ZONE
+})
 
 # Database settings
-DATABASE_CONFIG = {
+DATABASE_CONFIG = MappingProxyType({
     'db_path': DATABASE_PATH,
     'enable_wal_mode': True  # For better concurrent access
-}
+})
 
 # Visualization settings
-VISUALIZATION_CONFIG = {
+VISUALIZATION_CONFIG = MappingProxyType({
     'default_figsize': (12, 6),
     'dpi': 150,
     'spectrogram_cmap': 'magma',
     'peak_color': 'black',
     'peak_size': 2
-}
+})
 
 # Performance settings
-PERFORMANCE_CONFIG = {
+PERFORMANCE_CONFIG = MappingProxyType({
     'max_query_duration': 30.0,  # seconds
     'batch_size_fingerprints': 1000
-}
+})
+
+# Seconds of countdown before a microphone recording starts (0 to skip it)
+RECORDING_COUNTDOWN = 3
 
 # Output Configuration
 RECORDED_AUDIO_PATH = os.path.join(OUTPUT_DIR, "recorded_audio.wav")
@@ -68,12 +85,35 @@ RECORDED_AUDIO_PATH = os.path.join(OUTPUT_DIR, "recorded_audio.wav")
 # Supported Audio Formats
 SUPPORTED_AUDIO_FORMATS = {'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'}
 
+# Suffix tuple for folder scans: name.lower().endswith() checks every
+# extension in one C call without splitting the name
+SUPPORTED_AUDIO_SUFFIXES = tuple(sorted(SUPPORTED_AUDIO_FORMATS))
+
 # Processing Configuration
 BATCH_SIZE = 10000
 PROGRESS_UPDATE_INTERVAL = 100000
 
+# Songs written per committed transaction during folder uploads; an
+# interrupted upload keeps every batch committed before the interruption
+BULK_COMMIT_INTERVAL = 500
+
+# Set once the required directories are known to exist
+_DIRS_READY = False
+
 def ensure_directories():
     """Ensure all required directories exist."""
+    global _DIRS_READY
+    if _DIRS_READY:
+        return
+    
     directories = [DATA_DIR, OUTPUT_DIR, MUSIC_DIR]
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+        # Try mkdir directly; makedirs is only needed if a parent is missing
+        try:
+            os.mkdir(directory)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(directory, exist_ok=True)
+    
+    _DIRS_READY = True
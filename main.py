@@ -15,15 +15,7 @@ Project: Hocus Pocus
 Version: 1.0
 """
 
-from src.core.engine import Engine
-from src.cli.database_optimizer import check_and_optimize_database
-from src.cli.interface import (
-    display_welcome_message, 
-    get_user_choice, 
-    display_session_summary
-)
-from src.cli.identification import perform_audio_identification
-from src.cli.folder_upload import perform_folder_upload
+import argparse
 import config
 
 
@@ -34,30 +26,55 @@ def main():
     Ensures required directories exist and launches the interactive
     identification session.
     """
+    parser = argparse.ArgumentParser(description="Hocus Pocus audio identification")
+    parser.add_argument("--quiet", action="store_true",
+                        help="report folder uploads as JSON lines on stderr instead of formatted text")
+    args = parser.parse_args()
+    
     # Ensure all required directories exist
     config.ensure_directories()
     
     # Launch the interactive identification session
-    interactive_identification_session()
+    interactive_identification_session(quiet=args.quiet)
 
 
-def interactive_identification_session():
+def interactive_identification_session(quiet: bool = False):
     """
     Run the main interactive audio identification session.
     
     This function provides a user-friendly interface for real-time audio
     identification, allowing users to record audio from their microphone
     and receive instant song identification results.
+    
+    Args:
+        quiet: Report folder uploads as machine-readable JSON lines
     """
+    # Heavy audio/DSP modules are imported here rather than at module load
+    # so that the interpreter starts quickly
+    from src.core.engine import Engine
+    from src.cli.database_optimizer import check_and_optimize_database
+    from src.cli.interface import (
+        display_welcome_message, 
+        get_user_choice, 
+        display_session_summary
+    )
+    
     print("Initializing Hocus Pocus system...")
     
     # Initialize the audio identification engine
-    shazam_engine = Engine()
+    shazam_engine = Engine(
+        fft_size=config.FFT_SIZE,
+        hop_length=config.HOP_LENGTH,
+        fan_value=config.FAN_VALUE,
+        target_zone=config.TARGET_ZONE,
+        use_gpu=config.USE_GPU
+    )
+    shazam_engine.quiet = quiet
     
     # Check and perform database optimization if needed
     check_and_optimize_database(shazam_engine)
     
-    # Verify database is ready
+    # Verify database is ready (these stats are reused for the rest of the session)
     database_stats = shazam_engine.get_database_stats()
     if database_stats['total_songs'] == 0:
         print("No songs found in database. Please run bulk loading first.")
@@ -77,6 +94,9 @@ def interactive_identification_session():
             print(f"\nSession {session_count}")
             print("Play your song now and get ready...")
             
+            # Warm up the microphone backend while waiting for the user
+            shazam_engine.prewarm_audio()
+            
             # Get user input for identification
             user_choice = get_user_choice()
             
@@ -84,15 +104,18 @@ def interactive_identification_session():
                 break
             elif user_choice == 'yes':
                 # Perform audio identification
+                from src.cli.identification import perform_audio_identification
                 identification_result = perform_audio_identification(shazam_engine)
                 if identification_result:
                     successful_identifications += 1
             elif user_choice == 'upload':
                 # Upload songs from a folder
+                from src.cli.folder_upload import perform_folder_upload
                 upload_result = perform_folder_upload(shazam_engine)
                 if upload_result:
-                    # Update database stats after upload
-                    database_stats = shazam_engine.get_database_stats()
+                    # Update the cached stats in place instead of re-listing every song
+                    database_stats['total_songs'] += upload_result['songs_added']
+                    database_stats['total_fingerprints'] += upload_result['fingerprints_added']
                     print(f"Database now contains {database_stats['total_songs']:,} songs and {database_stats['total_fingerprints']:,} fingerprints")
             else:
                 print("Skipping this session...")
@@ -102,6 +125,9 @@ def interactive_identification_session():
     except Exception as e:
         print(f"\nUnexpected error: {e}")
     
+    # Release the pre-warmed microphone backend if it was never used
+    shazam_engine.audio_recorder.release()
+    
     # Display session summary
     display_session_summary(session_count - 1, successful_identifications)
 
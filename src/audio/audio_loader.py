@@ -11,20 +11,25 @@ Key Features:
 - Native WAV processing with proper bit-depth handling
 - Automatic audio normalization and type conversion
 - Error handling for corrupted or unsupported files
+- Parallel loading of many files across worker processes
 
 Dependencies:
 - FFmpeg (external tool for format conversion)
 - NumPy for numerical array processing
-- Python wave module for native WAV support
+- Python mmap module for zero-copy native WAV support
 
 Author: Hocus Pocus Project
 Version: 1.0
 """
 
+import os
+import mmap
+import struct
 import numpy as np
-import wave
 import subprocess
-from typing import Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Tuple, Optional, List, Iterable
 
 
 class AudioLoader:
@@ -36,6 +41,61 @@ class AudioLoader:
     libraries for optimal audio processing quality.
     """
     
+    PIPE_CHUNK_SIZE = 1 << 20  # Bytes read from the FFmpeg pipe per call (1 MiB)
+    INITIAL_DECODE_SECONDS = 60  # Decode buffer capacity before the first doubling
+    
+    WAVE_FORMAT_PCM = 0x0001
+    WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+    
+    @staticmethod
+    def _parse_wav_header(wav_data: mmap.mmap) -> Tuple[int, int, int, int, int]:
+        """
+        Walk the RIFF chunks of a WAV file to find its format and sample data.
+        
+        Args:
+            wav_data: Memory-mapped contents of the WAV file
+            
+        Returns:
+            Tuple of (num_channels, sample_width, sample_rate, data_offset, data_size)
+            
+        Raises:
+            ValueError: If the file is not an uncompressed PCM WAV file
+        """
+        if len(wav_data) < 12 or wav_data[0:4] != b'RIFF' or wav_data[8:12] != b'WAVE':
+            raise ValueError("file does not start with a RIFF id")
+        
+        audio_format = None
+        chunk_start = 12
+        while chunk_start + 8 <= len(wav_data):
+            chunk_id = wav_data[chunk_start:chunk_start + 4]
+            chunk_size, = struct.unpack_from('<I', wav_data, chunk_start + 4)
+            body_start = chunk_start + 8
+            
+            if chunk_id == b'fmt ':
+                if chunk_size < 16 or body_start + 16 > len(wav_data):
+                    raise ValueError("fmt chunk is truncated")
+                format_tag, num_channels, sample_rate, _, _, bits_per_sample = struct.unpack_from(
+                    '<HHIIHH', wav_data, body_start)
+                if format_tag == AudioLoader.WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                    # The sub-format GUID starts with the actual format tag
+                    format_tag, = struct.unpack_from('<H', wav_data, body_start + 24)
+                if format_tag != AudioLoader.WAVE_FORMAT_PCM:
+                    raise ValueError(f"unknown format: {format_tag}")
+                if num_channels == 0 or bits_per_sample == 0:
+                    raise ValueError("bad channel count or sample width")
+                audio_format = (num_channels, (bits_per_sample + 7) // 8, sample_rate)
+            
+            elif chunk_id == b'data':
+                if audio_format is None:
+                    raise ValueError("data chunk before fmt chunk")
+                # Writers that never finalized the header may overstate the size
+                return audio_format + (body_start, min(chunk_size, len(wav_data) - body_start))
+            
+            # Chunks are padded to an even number of bytes
+            chunk_start = body_start + chunk_size + (chunk_size & 1)
+        
+        raise ValueError("fmt chunk and/or data chunk missing")
+    
     @staticmethod
     def load_wav(path: str) -> Tuple[np.ndarray, int]:
         """
@@ -43,14 +103,16 @@ class AudioLoader:
         
         This method provides direct WAV file loading without external dependencies,
         ensuring accurate audio data extraction with proper normalization for
-        different bit depths (8-bit, 16-bit, 32-bit).
+        different bit depths (8-bit, 16-bit, 32-bit). The file is memory-mapped
+        and the samples are read in place, so the payload is never copied into
+        an intermediate bytes object.
         
         Args:
             path: Absolute or relative path to the WAV file
             
         Returns:
             Tuple containing:
-            - signal: Normalized float64 audio array in range [-1.0, 1.0]
+            - signal: Normalized float32 audio array in range [-1.0, 1.0]
             - sample_rate: Audio sample rate in Hz
             
         Raises:
@@ -58,17 +120,15 @@ class AudioLoader:
             ValueError: If the audio format is unsupported or corrupted
         """
         try:
-            with wave.open(path, 'rb') as wf:
-                num_channels = wf.getnchannels()
-                sample_width = wf.getsampwidth()
-                sample_rate = wf.getframerate()
-                num_frames = wf.getnframes()
-                raw_audio_data = wf.readframes(num_frames)
-
-        except wave.Error as e:
-            raise ValueError(f"Error reading WAV file '{path}': {e}")
+            with open(path, 'rb') as wav_file:
+                wav_data = mmap.mmap(wav_file.fileno(), 0, access=mmap.ACCESS_READ)
+            num_channels, sample_width, sample_rate, data_offset, data_size = \
+                AudioLoader._parse_wav_header(wav_data)
+
         except FileNotFoundError:
             raise FileNotFoundError(f"WAV file not found: {path}")
+        except (ValueError, struct.error) as e:  # mmap raises ValueError for empty files
+            raise ValueError(f"Error reading WAV file '{path}': {e}")
 
         # Convert byte data to numpy array with appropriate data type
         if sample_width == 1:  # 8-bit unsigned audio
@@ -80,27 +140,30 @@ class AudioLoader:
         else:
             raise ValueError(f"Unsupported sample width: {sample_width} bytes")
 
-        # Convert raw bytes to NumPy array with appropriate data type
-        audio_signal = np.frombuffer(raw_audio_data, dtype=audio_dtype)
-
-        # Convert stereo to mono by taking only the first channel
-        if num_channels > 1:
-            audio_signal = audio_signal[::num_channels]
+        # View the whole frames of the data chunk as a NumPy array; the array
+        # keeps the mapping alive until normalization below has read it
+        num_frames = data_size // (sample_width * num_channels)
+        audio_signal = np.frombuffer(wav_data, dtype=audio_dtype, count=num_frames * num_channels,
+                                     offset=data_offset)
 
-        # Normalize audio to floating-point range [-1.0, 1.0] based on bit depth
+        # Normalize audio to floating-point range [-1.0, 1.0] based on bit depth,
+        # converting and scaling in a single pass
+        scale = np.float32(1.0 / (1 << (8 * sample_width - 1)))
+        normalized_signal = np.multiply(audio_signal, scale, dtype=np.float32)
         if sample_width == 1:  # 8-bit unsigned: [0, 255] -> [-1, 1]
-            normalized_signal = (audio_signal - 128) / 128.0
-        elif sample_width == 2:  # 16-bit signed: [-32768, 32767] -> [-1, 1]
-            normalized_signal = audio_signal / float(2**(8 * sample_width - 1))
-        elif sample_width == 4:  # 32-bit signed: [-2^31, 2^31-1] -> [-1, 1]
-            normalized_signal = audio_signal / float(2**(8 * sample_width - 1))
-        else:
-            raise ValueError(f"Unsupported sample width for normalization: {sample_width} bytes")
+            normalized_signal -= np.float32(1.0)
+
+        # Convert stereo to mono by averaging the interleaved channels
+        if num_channels > 1:
+            usable_length = len(normalized_signal) - len(normalized_signal) % num_channels
+            normalized_signal = normalized_signal[:usable_length].reshape(-1, num_channels).mean(
+                axis=1, dtype=np.float32)
 
-        return normalized_signal.astype(np.float64), sample_rate
+        return normalized_signal, sample_rate
 
     @staticmethod
-    def load_audio_ffmpeg(path: str, sample_rate: int = 22050) -> Tuple[np.ndarray, int]:
+    def load_audio_ffmpeg(path: str, sample_rate: int = 22050,
+                          max_duration: Optional[float] = None) -> Tuple[np.ndarray, int]:
         """
         Load audio using FFmpeg with support for multiple formats and resampling.
         
@@ -111,6 +174,8 @@ class AudioLoader:
         Args:
             path: Path to the audio file (supports WAV, MP3, FLAC, M4A, etc.)
             sample_rate: Desired output sample rate in Hz (default: 22050)
+            max_duration: Decode at most this many seconds from the start of
+                         the file; FFmpeg stops there (default: whole file)
             
         Returns:
             Tuple containing:
@@ -126,10 +191,18 @@ class AudioLoader:
             # Construct FFmpeg command for high-quality audio conversion
             ffmpeg_command = [
                 "ffmpeg",
+                "-hide_banner",                # Skip the version/configuration banner
+                "-nostdin",                    # Never wait on keyboard input
+                "-threads", "0",               # Let FFmpeg pick the decoder thread count
                 "-i", path,                    # Input file path
+                "-vn", "-sn", "-dn",           # Ignore video (album art), subtitle and data streams
                 "-f", "f32le",                 # Output format: 32-bit float little-endian
                 "-ac", "1",                    # Convert to mono (1 audio channel)
                 "-ar", str(sample_rate),       # Resample to target sample rate
+            ]
+            if max_duration is not None:
+                ffmpeg_command += ["-t", str(max_duration)]  # Stop decoding at the limit
+            ffmpeg_command += [
                 "-y",                          # Overwrite output without asking
                 "pipe:1"                       # Send output to stdout pipe
             ]
@@ -138,18 +211,34 @@ class AudioLoader:
             ffmpeg_process = subprocess.Popen(
                 ffmpeg_command, 
                 stdout=subprocess.PIPE, 
-                stderr=subprocess.DEVNULL  # Suppress FFmpeg verbose output
+                stderr=subprocess.DEVNULL,  # Suppress FFmpeg verbose output
+                bufsize=AudioLoader.PIPE_CHUNK_SIZE
             )
             
-            # Read raw audio data from FFmpeg output
-            raw_audio_bytes = ffmpeg_process.stdout.read()
+            # Read FFmpeg's float32 output (already normalized) in fixed-size chunks
+            # straight into the sample array, doubling its capacity when full
+            capacity = sample_rate * AudioLoader.INITIAL_DECODE_SECONDS
+            if max_duration is not None:
+                # Short limits bound the output, so the buffer never has to grow
+                capacity = min(capacity, int(max_duration * sample_rate) + 2)
+            audio_signal = np.empty(capacity, dtype=np.float32)
+            filled_bytes = 0
+            while True:
+                if filled_bytes == audio_signal.nbytes:
+                    audio_signal.resize(2 * len(audio_signal), refcheck=False)
+                with memoryview(audio_signal).cast('B') as buffer_view:
+                    bytes_read = ffmpeg_process.stdout.readinto(
+                        buffer_view[filled_bytes:filled_bytes + AudioLoader.PIPE_CHUNK_SIZE])
+                if not bytes_read:
+                    break
+                filled_bytes += bytes_read
             return_code = ffmpeg_process.wait()
             
             if return_code != 0:
                 raise subprocess.CalledProcessError(return_code, ffmpeg_command)
 
-            # Convert bytes to float32 NumPy array (already normalized by FFmpeg)
-            audio_signal = np.frombuffer(raw_audio_bytes, dtype=np.float32)
+            # Release the unused capacity
+            audio_signal.resize(filled_bytes // audio_signal.itemsize, refcheck=False)
             
             return audio_signal, sample_rate
             
@@ -165,3 +254,30 @@ class AudioLoader:
             raise RuntimeError(f"FFmpeg failed to process '{path}': {e}")
         except Exception as e:
             raise RuntimeError(f"Unexpected error loading audio file '{path}': {e}")
+
+    @classmethod
+    def load_many(cls, paths: Iterable[str], sample_rate: int = 22050,
+                  workers: Optional[int] = None, chunksize: int = 8) -> List[Tuple[np.ndarray, int]]:
+        """
+        Load many audio files concurrently with FFmpeg.
+        
+        Each file is decoded by load_audio_ffmpeg() in a pool of worker
+        processes, so FFmpeg start-up and decoding overlap across files
+        instead of running one after another.
+        
+        Args:
+            paths: Paths to the audio files
+            sample_rate: Desired output sample rate in Hz (default: 22050)
+            workers: Number of worker processes (default: os.cpu_count())
+            chunksize: Number of paths handed to a worker at a time (default: 8)
+            
+        Returns:
+            List of (signal, sample_rate) tuples in the same order as paths
+            
+        Raises:
+            RuntimeError: If any file fails to load (as in load_audio_ffmpeg())
+        """
+        load_file = partial(cls.load_audio_ffmpeg, sample_rate=sample_rate)
+        
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            return list(executor.map(load_file, paths, chunksize=chunksize))
@@ -8,9 +8,11 @@ Author: Hocus Pocus Project
 Version: 1.0
 """
 
+import numpy as np
 import pyaudio
+import threading
 import wave
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class AudioRecorder:
@@ -42,6 +44,146 @@ class AudioRecorder:
         self.channels = channels
         self.chunk_size = 1024  # Buffer size for audio streaming
         self.format = pyaudio.paInt16  # 16-bit audio for good quality/size balance
+        self._audio_interface = None  # PyAudio instance opened ahead of time by prewarm()
+        self._warmup_thread = None
+        self._armed = None  # (PyAudio instance, unstarted input stream) opened by arm()
+        self._arming_thread = None
+        self._capture_buffer = None  # Preallocated int16 samples filled by the stream callback
+        self._capture_position = 0  # Number of frames written to the capture buffer
+        self._capture_overflows = 0
+        self._capture_done = threading.Event()
+
+    def prewarm(self) -> None:
+        """
+        Initialize PortAudio in the background so the next recording starts sooner.
+        
+        PortAudio initialization probes every host API and device, which can
+        take hundreds of milliseconds. Calling this while waiting on user input
+        hides that latency; record() waits for the warm-up to finish.
+        """
+        if self._audio_interface is not None or self._warmup_thread is not None:
+            return
+        
+        self._warmup_thread = threading.Thread(target=self._warm_up, daemon=True)
+        self._warmup_thread.start()
+
+    def arm(self) -> None:
+        """
+        Open the input stream in the background without starting capture.
+        
+        Opening the device takes a noticeable moment on some systems; calling
+        this before a countdown lets it overlap with the wait, and the next
+        recording only has to start the stream.
+        """
+        if self._armed is not None or self._arming_thread is not None:
+            return
+        
+        self._arming_thread = threading.Thread(target=self._open_armed_stream, daemon=True)
+        self._arming_thread.start()
+
+    def release(self) -> None:
+        """
+        Release a pre-warmed PortAudio instance that was never used for recording.
+        """
+        audio_interface, stream = self._take_armed_stream()
+        if stream is not None:
+            stream.close()
+            audio_interface.terminate()
+        
+        if self._warmup_thread is not None:
+            self._warmup_thread.join()
+            self._warmup_thread = None
+        if self._audio_interface is not None:
+            self._audio_interface.terminate()
+            self._audio_interface = None
+
+    def _warm_up(self) -> None:
+        """Open the PyAudio interface, leaving any error for record() to report."""
+        try:
+            self._audio_interface = pyaudio.PyAudio()
+        except Exception:
+            self._audio_interface = None
+
+    def _open_armed_stream(self) -> None:
+        """Open an unstarted input stream for arm(), leaving any error for record() to report."""
+        try:
+            audio_interface = self._acquire_audio_interface()
+        except Exception:
+            return
+        
+        try:
+            self._armed = (audio_interface, self._open_stream(audio_interface, start=False))
+        except Exception:
+            audio_interface.terminate()
+
+    def _take_armed_stream(self) -> Tuple[Optional[pyaudio.PyAudio], Optional[pyaudio.Stream]]:
+        """
+        Take ownership of the stream opened by arm(), if any.
+        
+        Returns:
+            Tuple of (PyAudio instance, unstarted stream), or (None, None)
+        """
+        if self._arming_thread is not None:
+            self._arming_thread.join()
+            self._arming_thread = None
+        
+        armed = self._armed or (None, None)
+        self._armed = None
+        return armed
+
+    def _open_stream(self, audio_interface: pyaudio.PyAudio, start: bool = True) -> pyaudio.Stream:
+        """Open a callback-driven input stream with the recorder's audio settings."""
+        return audio_interface.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk_size,
+            stream_callback=self._stream_callback,
+            start=start
+        )
+
+    def _stream_callback(self, in_data: bytes, frame_count: int, time_info: dict,
+                         status_flags: int) -> Tuple[None, int]:
+        """
+        Copy one buffer of input into the capture buffer (runs on the PortAudio thread).
+        
+        Returns:
+            Tuple of (no output data, paContinue or paComplete once the buffer is full)
+        """
+        if status_flags & pyaudio.paInputOverflow:
+            self._capture_overflows += 1
+        
+        capture_buffer = self._capture_buffer
+        if capture_buffer is None:
+            return None, pyaudio.paComplete
+        
+        total_frames = len(capture_buffer) // self.channels
+        frames_to_copy = min(frame_count, total_frames - self._capture_position)
+        start = self._capture_position * self.channels
+        end = start + frames_to_copy * self.channels
+        capture_buffer[start:end] = np.frombuffer(in_data, dtype=np.int16, count=end - start)
+        self._capture_position += frames_to_copy
+        
+        if self._capture_position >= total_frames:
+            self._capture_done.set()
+            return None, pyaudio.paComplete
+        return None, pyaudio.paContinue
+
+    def _acquire_audio_interface(self) -> pyaudio.PyAudio:
+        """
+        Take ownership of the pre-warmed PyAudio interface, or open a new one.
+        
+        Returns:
+            PyAudio instance that the caller is responsible for terminating.
+        """
+        if self._warmup_thread is not None:
+            self._warmup_thread.join()
+            self._warmup_thread = None
+        
+        audio_interface = self._audio_interface or pyaudio.PyAudio()
+        self._audio_interface = None
+        return audio_interface
 
     def record(self) -> str:
         """
@@ -62,36 +204,78 @@ class AudioRecorder:
             Ensure your microphone is connected and not being used by other
             applications before calling this method.
         """
+        audio_samples, sample_width = self._capture()
+        
+        # Save recorded audio to WAV file
+        self._save_audio_file(audio_samples, sample_width)
+        
+        print(f"Audio saved to: {self.filename}")
+        return self.filename
+    
+    def record_samples(self) -> np.ndarray:
+        """
+        Record audio from the default microphone and return it in memory.
+        
+        Unlike record(), nothing is written to disk, so the samples can be
+        analyzed directly without a WAV write and re-decode.
+        
+        Returns:
+            Normalized float32 mono audio array in range [-1.0, 1.0]
+            
+        Raises:
+            RuntimeError: If audio recording fails due to microphone issues
+                         or insufficient system resources.
+        """
+        audio_signal, _ = self._capture()
+        
+        # 16-bit signed PCM -> [-1, 1]
+        normalized_signal = audio_signal.astype(np.float32) / 32768.0
+        
+        # Mix interleaved channels down to mono
+        if self.channels > 1:
+            usable_length = len(normalized_signal) - len(normalized_signal) % self.channels
+            normalized_signal = normalized_signal[:usable_length].reshape(-1, self.channels).mean(axis=1)
+        
+        return normalized_signal
+    
+    def _capture(self) -> Tuple[np.ndarray, int]:
+        """
+        Capture raw audio from the default microphone.
+        
+        The stream runs in callback mode: PortAudio hands each buffer to
+        _stream_callback(), which copies it straight into one preallocated
+        array, so no Python loop has to keep pace with the device.
+        
+        Returns:
+            Tuple of (interleaved int16 samples, sample width in bytes)
+        """
         audio_interface = None
         stream = None
         
+        total_frames = int(self.sample_rate * self.duration)
+        self._capture_buffer = np.empty(total_frames * self.channels, dtype=np.int16)
+        self._capture_position = 0
+        self._capture_overflows = 0
+        self._capture_done.clear()
+        
         try:
-            # Initialize PyAudio interface
-            audio_interface = pyaudio.PyAudio()
-            
-            # Configure audio stream for recording
-            stream = audio_interface.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk_size
-            )
+            audio_interface, stream = self._take_armed_stream()
+            if stream is None:
+                # Initialize PyAudio interface (reusing a pre-warmed one if available)
+                audio_interface = self._acquire_audio_interface()
+                
+                # Configure audio stream for recording
+                stream = self._open_stream(audio_interface, start=False)
 
             print(f"Recording audio for {self.duration} seconds...")
+            stream.start_stream()
             
-            # Calculate total number of chunks needed
-            total_chunks = int(self.sample_rate / self.chunk_size * self.duration)
-            audio_frames = []
+            # Wait for the callback to fill the buffer, allowing some slack for a slow device
+            if not self._capture_done.wait(timeout=self.duration + 5):
+                print("Warning: Recording ended early; the audio device stopped delivering input.")
             
-            # Record audio in chunks
-            for chunk_num in range(total_chunks):
-                try:
-                    audio_data = stream.read(self.chunk_size, exception_on_overflow=False)
-                    audio_frames.append(audio_data)
-                except IOError as e:
-                    print(f"Warning: Audio buffer overflow (chunk {chunk_num}): {e}")
-                    continue
+            if self._capture_overflows:
+                print(f"Warning: Audio buffer overflowed {self._capture_overflows} time(s) during recording.")
                     
             print("Recording completed successfully.")
             
@@ -105,27 +289,26 @@ class AudioRecorder:
                 stream.close()
             if audio_interface:
                 audio_interface.terminate()
+            
+            audio_samples = self._capture_buffer[:self._capture_position * self.channels]
+            self._capture_buffer = None
 
-        # Save recorded audio to WAV file
-        self._save_audio_file(audio_frames, audio_interface)
-        
-        print(f"Audio saved to: {self.filename}")
-        return self.filename
+        return audio_samples, pyaudio.get_sample_size(self.format)
     
-    def _save_audio_file(self, audio_frames: list, audio_interface: pyaudio.PyAudio) -> None:
+    def _save_audio_file(self, audio_samples: np.ndarray, sample_width: int) -> None:
         """
-        Save recorded audio frames to a WAV file.
+        Save recorded audio samples to a WAV file.
         
         Args:
-            audio_frames: List of audio data chunks from recording.
-            audio_interface: PyAudio instance for getting sample width.
+            audio_samples: Interleaved int16 samples from recording.
+            sample_width: Sample width in bytes.
         """
         try:
             with wave.open(self.filename, 'wb') as wav_file:
                 wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(audio_interface.get_sample_size(self.format))
+                wav_file.setsampwidth(sample_width)
                 wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(b''.join(audio_frames))
+                wav_file.writeframes(audio_samples)
                 
         except Exception as e:
             raise RuntimeError(f"Failed to save audio file: {e}")
\ No newline at end of file
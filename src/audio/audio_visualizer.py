@@ -24,7 +24,7 @@ import matplotlib
 matplotlib.use('Agg')  # Configure non-interactive backend for server compatibility
 import matplotlib.pyplot as plt
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 
 
 class AudioVisualizer:
@@ -36,6 +36,51 @@ class AudioVisualizer:
     and combined analysis views essential for audio fingerprinting systems.
     """
     
+    SAVE_DPI = 150  # Resolution of saved plots
+    
+    @staticmethod
+    def _downsample_for_display(spectrogram_db: np.ndarray, figure_size: Tuple[int, int],
+                                dpi: int = SAVE_DPI) -> np.ndarray:
+        """
+        Reduce a spectrogram to roughly the pixel grid of the figure.
+        
+        Each axis that has more than twice as many bins as there are pixels
+        is reduced by taking the maximum over groups of neighbouring bins, so
+        prominent peaks stay visible.
+        
+        Args:
+            spectrogram_db: Magnitude spectrogram (frequency bins x time frames)
+            figure_size: Plot dimensions as (width, height) in inches
+            dpi: Output resolution in dots per inch
+            
+        Returns:
+            Spectrogram with at most about figure_size * dpi bins per axis
+        """
+        target_times = int(figure_size[0] * dpi)
+        target_freqs = int(figure_size[1] * dpi)
+        
+        for axis, target in ((1, target_times), (0, target_freqs)):
+            num_bins = spectrogram_db.shape[axis]
+            if num_bins > 2 * target:
+                group_size = -(-num_bins // target)  # Ceiling division
+                spectrogram_db = np.maximum.reduceat(spectrogram_db, np.arange(0, num_bins, group_size),
+                                                     axis=axis)
+        return spectrogram_db
+    
+    @staticmethod
+    def _show_spectrogram(spectrogram_db: np.ndarray, frequencies: np.ndarray, times: np.ndarray,
+                          figure_size: Tuple[int, int], **imshow_kwargs):
+        """
+        Draw a spectrogram as a single image spanning the given time/frequency range.
+        
+        Returns:
+            The AxesImage, for attaching a colorbar
+        """
+        display_db = AudioVisualizer._downsample_for_display(spectrogram_db, figure_size)
+        return plt.imshow(display_db, origin='lower', aspect='auto', interpolation='nearest',
+                          extent=[times[0], times[-1], frequencies[0], frequencies[-1]],
+                          cmap="magma", **imshow_kwargs)
+    
     @staticmethod
     def plot_spectrogram(spectrogram_db: np.ndarray, frequencies: np.ndarray, times: np.ndarray, 
                         title: str = "Audio Spectrogram", save_path: Optional[str] = None, 
@@ -58,19 +103,18 @@ class AudioVisualizer:
         """
         plt.figure(figsize=figure_size)
         
-        # Create high-quality spectrogram plot with smooth shading
-        mesh_plot = plt.pcolormesh(times, frequencies, spectrogram_db, 
-                                  shading="gouraud", cmap="magma")
+        # Draw the spectrogram as one image, reduced to the figure's resolution
+        spectrogram_image = AudioVisualizer._show_spectrogram(spectrogram_db, frequencies, times, figure_size)
         
         # Add professional colorbar with clear labeling
-        colorbar = plt.colorbar(mesh_plot, label="Magnitude (dB)")
+        colorbar = plt.colorbar(spectrogram_image, label="Magnitude (dB)")
         colorbar.ax.tick_params(labelsize=10)
         
         # Configure axes with proper labels and limits
         plt.ylabel("Frequency (Hz)", fontsize=12)
         plt.xlabel("Time (s)", fontsize=12)
         plt.title(title, fontsize=14, fontweight='bold')
-        plt.ylim(0, np.max(frequencies))
+        plt.ylim(0, frequencies[-1])  # Axes are ascending, so the last bin is the maximum
         
         # Apply professional styling
         plt.grid(True, alpha=0.3)
@@ -78,7 +122,7 @@ class AudioVisualizer:
         
         # Save plot if path specified
         if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+            plt.savefig(save_path, dpi=AudioVisualizer.SAVE_DPI, bbox_inches='tight', facecolor='white')
             print(f"Spectrogram saved to: {save_path}")
         
         # Display plot if requested (typically not used in batch processing)
@@ -88,7 +132,7 @@ class AudioVisualizer:
         plt.close()
 
     @staticmethod
-    def plot_peaks_only(frequencies: np.ndarray, times: np.ndarray, peak_coordinates: List[Tuple[int, int]], 
+    def plot_peaks_only(frequencies: np.ndarray, times: np.ndarray, peak_coordinates: Union[np.ndarray, List[Tuple[int, int]]], 
                        title: str = "Constellation Map - Audio Peaks", save_path: Optional[str] = None, 
                        show_plot: bool = False, figure_size: Tuple[int, int] = (12, 6)) -> None:
         """
@@ -101,7 +145,7 @@ class AudioVisualizer:
         Args:
             frequencies: Frequency bin centers in Hz
             times: Time frame centers in seconds
-            peak_coordinates: List of detected peaks as (time_index, freq_index) tuples
+            peak_coordinates: Detected peaks as an (N, 2) array of (time_index, freq_index) rows
             title: Plot title for the visualization
             save_path: File path to save the plot (PNG format recommended)
             show_plot: Whether to display the plot interactively
@@ -111,10 +155,11 @@ class AudioVisualizer:
         plt.gca().set_facecolor('white')
         
         # Plot peaks if any were detected
-        if peak_coordinates:
+        peak_coordinates = np.asarray(peak_coordinates, dtype=np.intp).reshape(-1, 2)
+        if len(peak_coordinates):
             # Convert indices to actual time/frequency values
-            peak_times = [times[time_idx] for time_idx, freq_idx in peak_coordinates]
-            peak_frequencies = [frequencies[freq_idx] for time_idx, freq_idx in peak_coordinates]
+            peak_times = times[peak_coordinates[:, 0]]
+            peak_frequencies = frequencies[peak_coordinates[:, 1]]
             
             # Create scatter plot of peaks with professional styling
             plt.scatter(peak_times, peak_frequencies, c='black', s=2, alpha=0.8, 
@@ -128,14 +173,14 @@ class AudioVisualizer:
         plt.ylabel("Frequency (Hz)", fontsize=12)
         plt.xlabel("Time (s)", fontsize=12)
         plt.title(title, fontsize=14, fontweight='bold')
-        plt.xlim(0, np.max(times))
-        plt.ylim(0, np.max(frequencies))
+        plt.xlim(0, times[-1])
+        plt.ylim(0, frequencies[-1])
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
         
         # Save plot if path specified
         if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+            plt.savefig(save_path, dpi=AudioVisualizer.SAVE_DPI, bbox_inches='tight', facecolor='white')
             print(f"Peaks plot saved to: {save_path}")
         
         # Display plot if requested
@@ -146,7 +191,7 @@ class AudioVisualizer:
     
     @staticmethod
     def plot_combined_analysis(spectrogram_db: np.ndarray, frequencies: np.ndarray, times: np.ndarray,
-                              peak_coordinates: List[Tuple[int, int]], 
+                              peak_coordinates: Union[np.ndarray, List[Tuple[int, int]]], 
                               title: str = "Combined Audio Analysis - Spectrogram with Constellation Map",
                               save_path: Optional[str] = None, show_plot: bool = False) -> None:
         """
@@ -160,24 +205,26 @@ class AudioVisualizer:
             spectrogram_db: Magnitude spectrogram in decibel scale
             frequencies: Frequency bin centers in Hz
             times: Time frame centers in seconds
-            peak_coordinates: List of detected peaks as (time_index, freq_index) tuples
+            peak_coordinates: Detected peaks as an (N, 2) array of (time_index, freq_index) rows
             title: Plot title for the comprehensive analysis
             save_path: File path to save the plot (PNG format recommended)
             show_plot: Whether to display the plot interactively
         """
-        plt.figure(figsize=(14, 8))
+        figure_size = (14, 8)
+        plt.figure(figsize=figure_size)
         
         # Plot spectrogram as background with transparency
-        mesh_plot = plt.pcolormesh(times, frequencies, spectrogram_db, 
-                                  shading="gouraud", cmap="magma", alpha=0.8)
-        colorbar = plt.colorbar(mesh_plot, label="Magnitude (dB)")
+        spectrogram_image = AudioVisualizer._show_spectrogram(spectrogram_db, frequencies, times, figure_size,
+                                                      alpha=0.8)
+        colorbar = plt.colorbar(spectrogram_image, label="Magnitude (dB)")
         colorbar.ax.tick_params(labelsize=10)
         
         # Overlay constellation peaks with high visibility
-        if peak_coordinates:
+        peak_coordinates = np.asarray(peak_coordinates, dtype=np.intp).reshape(-1, 2)
+        if len(peak_coordinates):
             # Convert indices to actual time/frequency values
-            peak_times = [times[time_idx] for time_idx, freq_idx in peak_coordinates]
-            peak_frequencies = [frequencies[freq_idx] for time_idx, freq_idx in peak_coordinates]
+            peak_times = times[peak_coordinates[:, 0]]
+            peak_frequencies = frequencies[peak_coordinates[:, 1]]
             
             # Plot peaks with cyan color and white edges for maximum visibility
             plt.scatter(peak_times, peak_frequencies, c='cyan', s=3, alpha=0.9, 
@@ -189,13 +236,13 @@ class AudioVisualizer:
         plt.ylabel("Frequency (Hz)", fontsize=12)
         plt.xlabel("Time (s)", fontsize=12)
         plt.title(title, fontsize=14, fontweight='bold')
-        plt.ylim(0, np.max(frequencies))
+        plt.ylim(0, frequencies[-1])
         plt.grid(True, alpha=0.2)
         plt.tight_layout()
         
         # Save plot if path specified
         if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+            plt.savefig(save_path, dpi=AudioVisualizer.SAVE_DPI, bbox_inches='tight', facecolor='white')
             print(f"Combined analysis plot saved to: {save_path}")
         
         # Display plot if requested
@@ -12,10 +12,14 @@ Key Features:
 - Configurable window functions and analysis parameters
 - Optimized stride tricks for efficient memory usage
 - Decibel scaling with floor limiting for robust analysis
+- Optional CUDA-accelerated STFT through PyTorch
 
 Dependencies:
 - NumPy for numerical computing and FFT operations
+- SciPy FFT (when installed) for multithreaded transforms
 - NumPy stride tricks for efficient array operations
+- SciPy ndimage for local maxima filtering (NumPy fallback when missing)
+- PyTorch with CUDA (optional) for GPU spectrograms
 
 Author: Hocus Pocus Project
 Version: 1.0
@@ -23,7 +27,17 @@ Version: 1.0
 
 import numpy as np
 from numpy.lib.stride_tricks import as_strided
-from typing import Tuple, List, Callable
+from typing import Tuple, List, Callable, Optional
+
+try:
+    from scipy import fft as scipy_fft  # Multithreaded, dtype-preserving FFTs
+except ImportError:  # Fall back to NumPy's single-threaded FFT
+    scipy_fft = None
+
+try:
+    from scipy import ndimage
+except ImportError:  # Fall back to the NumPy maximum filter below
+    ndimage = None
 
 
 class SpectrogramProcessor:
@@ -35,8 +49,12 @@ class SpectrogramProcessor:
     for audio fingerprinting and identification.
     """
     
+    # Number of frames windowed and transformed per vectorized FFT call
+    FRAMES_PER_BLOCK = 1024
+    
     def __init__(self, fft_size: int = 2048, hop_length: int = 512, 
-                 window_fn: Callable = np.hanning, db_floor: float = -80.0):
+                 window_fn: Callable = np.hanning, db_floor: float = -80.0,
+                 use_gpu: bool = False):
         """
         Initialize the spectrogram processor with analysis parameters.
         
@@ -45,11 +63,16 @@ class SpectrogramProcessor:
             hop_length: Number of samples between successive frames (default: 512)
             window_fn: Window function to apply before FFT (default: Hanning window)
             db_floor: Minimum dB value for dynamic range limiting (default: -80.0)
+            use_gpu: Compute the STFT on a CUDA GPU when PyTorch with CUDA is
+                    available, falling back to NumPy otherwise (default: False)
         """
         self.fft_size = fft_size
         self.hop_length = hop_length
         self.window_function = window_fn
         self.decibel_floor = db_floor
+        self.use_gpu = use_gpu
+        self._window = None  # Analysis window, built on first use
+        self._rfftfreq_cache = {}  # Frequency bin centers per sample rate
     
     def compute_spectrogram(self, signal: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
@@ -60,7 +83,7 @@ class SpectrogramProcessor:
         suitable for peak detection and fingerprinting.
         
         Args:
-            signal: Normalized audio signal array (typically float64)
+            signal: Normalized audio signal array (processed as float32)
             sample_rate: Audio sample rate in Hz
             
         Returns:
@@ -72,49 +95,95 @@ class SpectrogramProcessor:
         if len(signal) < self.fft_size:
             raise ValueError(f"Signal too short ({len(signal)}) for FFT size ({self.fft_size})")
         
-        # Prepare analysis window
-        analysis_window = self.window_function(self.fft_size)
+        # Prepare analysis window once (float32 like the signal, so nothing is upcast)
+        if self._window is None:
+            self._window = self.window_function(self.fft_size).astype(np.float32)
+        analysis_window = self._window
         
         # Calculate number of analysis frames
         num_frames = 1 + (len(signal) - self.fft_size) // self.hop_length
         
-        # Initialize spectrogram matrix (frequency bins x time frames)
-        spectrogram_magnitude = np.zeros((self.fft_size // 2 + 1, num_frames))
-
-        # Process each time frame with FFT analysis
-        for frame_index in range(num_frames):
-            start_sample = frame_index * self.hop_length
-            end_sample = start_sample + self.fft_size
+        # Use the GPU when enabled and usable
+        spectrogram_magnitude = self._stft_magnitude_gpu(signal, analysis_window) if self.use_gpu else None
+        
+        if spectrogram_magnitude is None:
+            # Initialize spectrogram matrix (frequency bins x time frames)
+            spectrogram_magnitude = np.empty((self.fft_size // 2 + 1, num_frames), dtype=np.float32)
             
-            # Extract frame
-            audio_frame = signal[start_sample:end_sample]
-            if len(audio_frame) < self.fft_size:
-                audio_frame = np.pad(audio_frame, (0, self.fft_size - len(audio_frame)))
-
-            # Apply window function and compute FFT
-            windowed_frame = audio_frame * analysis_window
-            frequency_spectrum = np.fft.rfft(windowed_frame)
-            magnitude_spectrum = np.abs(frequency_spectrum)
-            spectrogram_magnitude[:, frame_index] = magnitude_spectrum
+            # View the signal as overlapping frames (frames x fft_size) without copying
+            signal = np.ascontiguousarray(signal, dtype=np.float32)
+            sample_stride = signal.strides[0]
+            frames = as_strided(signal, shape=(num_frames, self.fft_size),
+                                strides=(sample_stride * self.hop_length, sample_stride),
+                                writeable=False)
+            
+            # Window and FFT a block of frames per call; blocks bound the size of
+            # the windowed copy for long signals
+            for block_start in range(0, num_frames, self.FRAMES_PER_BLOCK):
+                block_end = min(block_start + self.FRAMES_PER_BLOCK, num_frames)
+                windowed_frames = frames[block_start:block_end] * analysis_window
+                if scipy_fft is not None:
+                    frequency_spectra = scipy_fft.rfft(windowed_frames, axis=1, workers=-1)
+                else:
+                    frequency_spectra = np.fft.rfft(windowed_frames, axis=1)
+                np.abs(frequency_spectra.T, out=spectrogram_magnitude[:, block_start:block_end])
 
-        # Convert to dB scale
-        spectrogram_db = 20 * np.log10(spectrogram_magnitude + 1e-10)
-        spectrogram_db = np.maximum(spectrogram_db, self.decibel_floor)
+        # Convert to dB scale in place; the magnitude buffer becomes the result
+        spectrogram_db = spectrogram_magnitude
+        np.add(spectrogram_db, 1e-10, out=spectrogram_db)
+        np.log10(spectrogram_db, out=spectrogram_db)
+        np.multiply(spectrogram_db, 20.0, out=spectrogram_db)
+        np.maximum(spectrogram_db, self.decibel_floor, out=spectrogram_db)
 
         # Generate axes
-        frequency_bins = np.fft.rfftfreq(self.fft_size, d=1.0/sample_rate)
+        frequency_bins = self._rfftfreq_cache.get(sample_rate)
+        if frequency_bins is None:
+            frequency_bins = np.fft.rfftfreq(self.fft_size, d=1.0/sample_rate)
+            self._rfftfreq_cache[sample_rate] = frequency_bins
         time_frames = np.arange(num_frames) * self.hop_length / sample_rate
 
         return spectrogram_db, frequency_bins, time_frames
 
+    def _stft_magnitude_gpu(self, signal: np.ndarray, analysis_window: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Compute the STFT magnitude on a CUDA GPU with PyTorch.
+        
+        Frames match the NumPy path (no centering or padding). PyTorch is only
+        imported here, so start-up is unaffected when the GPU is not used. Any
+        failure (PyTorch missing, no GPU, CUDA unusable in a worker process)
+        disables the GPU path for this processor.
+        
+        Args:
+            signal: Audio signal array
+            analysis_window: Window of length fft_size
+            
+        Returns:
+            Magnitude spectrogram (frequency bins x time frames), or None if
+            the GPU cannot be used
+        """
+        try:
+            import torch
+            if not torch.cuda.is_available():
+                raise RuntimeError("CUDA is not available")
+            
+            device = torch.device('cuda')
+            samples = torch.from_numpy(np.ascontiguousarray(signal, dtype=np.float32)).to(device)
+            window = torch.from_numpy(np.asarray(analysis_window, dtype=np.float32)).to(device)
+            spectrum = torch.stft(samples, n_fft=self.fft_size, hop_length=self.hop_length,
+                                  window=window, center=False, return_complex=True)
+            return spectrum.abs().cpu().numpy()
+        except Exception:
+            self.use_gpu = False
+            return None
+
     @staticmethod
     def maximum_filter(array: np.ndarray, filter_size: Tuple[int, int]) -> np.ndarray:
         """
         Apply maximum filter for efficient local maxima detection.
         
-        This method uses NumPy stride tricks to implement a sliding window
-        maximum filter, which is essential for identifying local peaks
-        in the spectrogram for fingerprinting.
+        This method uses SciPy's maximum filter, whose running-maximum
+        implementation costs the same per element regardless of the window
+        size, to find the local maximum around every spectrogram bin.
         
         Args:
             array: Input 2D array (typically spectrogram)
@@ -124,30 +193,45 @@ class SpectrogramProcessor:
             Filtered array with local maxima preserved
         """
         freq_window, time_window = filter_size
-        freq_dim, time_dim = array.shape
-        
-        # Create sliding window view using stride tricks
-        output_shape = (freq_dim - freq_window + 1, time_dim - time_window + 1, freq_window, time_window)
-        output_strides = array.strides + array.strides
-        sliding_windows = as_strided(array, shape=output_shape, strides=output_strides)
-        
-        # Find maximum in each window
-        filtered_result = np.max(sliding_windows, axis=(2, 3))
-        
-        # Apply padding to maintain original array dimensions
-        freq_pad = (freq_window - 1) // 2
-        time_pad = (time_window - 1) // 2
-        padded_result = np.pad(
-            filtered_result, 
-            ((freq_pad, freq_window - 1 - freq_pad), (time_pad, time_window - 1 - time_pad)), 
-            mode='edge'
-        )
-        
-        return padded_result
+        
+        if ndimage is not None:
+            # Even-sized windows reach one bin further forward than backward
+            origin = (-1 if freq_window % 2 == 0 else 0, -1 if time_window % 2 == 0 else 0)
+            return ndimage.maximum_filter(array, size=filter_size, mode='nearest', origin=origin)
+        
+        # Without SciPy: a rectangular maximum is a maximum along frequency
+        # followed by a maximum along time
+        freq_filtered = SpectrogramProcessor._running_max(array, freq_window)
+        return SpectrogramProcessor._running_max(freq_filtered.T, time_window).T
+    
+    @staticmethod
+    def _running_max(array: np.ndarray, window: int) -> np.ndarray:
+        """
+        Maximum over a sliding window along the first axis, matching the SciPy path.
+        
+        The edges are extended so the output keeps the input shape; each
+        step is one in-place np.maximum, so no windowed copy is materialized.
+        
+        Args:
+            array: Input array
+            window: Window length along the first axis
+            
+        Returns:
+            Array of the same shape holding the windowed maxima
+        """
+        before = (window - 1) // 2
+        pad_width = ((before, window - 1 - before),) + ((0, 0),) * (array.ndim - 1)
+        padded = np.pad(array, pad_width, mode='edge')
+        
+        length = array.shape[0]
+        result = padded[:length].copy()
+        for offset in range(1, window):
+            np.maximum(result, padded[offset:offset + length], out=result)
+        return result
 
     def find_peaks(self, spectrogram_db: np.ndarray, 
                    neighborhood_size: Tuple[int, int] = (20, 20), 
-                   threshold_db: float = -50.0) -> List[Tuple[int, int]]:
+                   threshold_db: float = -50.0) -> np.ndarray:
         """
         Identify prominent peaks in spectrogram for constellation map generation.
         
@@ -161,14 +245,22 @@ class SpectrogramProcessor:
             threshold_db: Minimum decibel threshold for peak detection
             
         Returns:
-            List of peak coordinates as (time_index, freq_index) tuples
+            int32 array of shape (num_peaks, 2) holding (time_index, freq_index) rows,
+            ordered by time and then frequency
         """
         # CPU implementation
         local_maxima = self.maximum_filter(spectrogram_db, neighborhood_size)
-        peak_mask = (spectrogram_db == local_maxima) & (spectrogram_db > threshold_db)
-        peak_coordinates = np.argwhere(peak_mask)
         
-        # Convert to (time, frequency) format
-        peak_list = [(time_idx, freq_idx) for freq_idx, time_idx in peak_coordinates]
+        # Reuse the equality mask for the threshold test instead of allocating another
+        peak_mask = spectrogram_db == local_maxima
+        peak_mask &= spectrogram_db > threshold_db
+        # Scanning the transposed mask yields the peaks in time order, so the
+        # fingerprint generator can skip its sort (sorted_by_time=True)
+        time_indices, freq_indices = np.nonzero(peak_mask.T)
         
-        return peak_list
+        # Convert to compact (time, frequency) rows; int32 halves the size of
+        # the int64 indices from np.nonzero
+        peaks = np.empty((len(time_indices), 2), dtype=np.int32)
+        peaks[:, 0] = time_indices
+        peaks[:, 1] = freq_indices
+        return peaks
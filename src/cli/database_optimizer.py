@@ -9,16 +9,22 @@ Project: Hocus Pocus
 """
 
 from src.core.engine import Engine
+from src.cli.interface import prompt_choice
 from typing import Dict, Any
 
 
+# Accepted answers to the optimization prompt
+_OPTIMIZE_CHOICES = {'y': True, 'yes': True, 'n': False, 'no': False}
+
+
 def check_and_optimize_database(shazam_engine: Engine) -> None:
     """
     Check if database optimization is needed and perform it automatically.
     
     This function ensures the database is always in an optimized state by
-    checking for binary blob data and converting it to proper integers
-    for better performance and storage efficiency.
+    checking for binary blob data and converting it to proper integers,
+    and for an outdated lookup index, for better performance and storage
+    efficiency.
     
     Args:
         shazam_engine: Initialized Engine instance.
@@ -29,42 +35,45 @@ def check_and_optimize_database(shazam_engine: Engine) -> None:
     
     # Check if optimization is needed
     if db_manager.needs_optimization():
-        print("Database optimization needed - found binary blob data")
+        print("Database optimization needed - found binary blob data or an outdated lookup index")
         
         # Get current database size info
         size_info = db_manager.get_database_size_info()
         print(f"Current database size: {size_info['size_mb']:.1f} MB ({size_info['fingerprint_count']:,} fingerprints)")
         
-        # Ask user if they want to optimize now
-        try:
-            choice = input("\nWould you like to optimize the database now? This will improve performance and reduce size. (y/n): ").strip().lower()
+        # Ask user if they want to optimize now; any answer other than yes means no
+        optimize_now = prompt_choice(
+            "\nWould you like to optimize the database now? This will improve performance and reduce size. (y/n): ",
+            _OPTIMIZE_CHOICES, interrupted=False, default=False)
+        
+        if optimize_now:
+            print("\n" + "=" * 60)
+            print("STARTING AUTOMATIC DATABASE OPTIMIZATION")
+            print("=" * 60)
             
-            if choice in ['y', 'yes']:
+            # Perform optimization
+            optimization_result = db_manager.optimize_database()
+            shazam_engine.invalidate_stats()
+            
+            if optimization_result['optimized']:
                 print("\n" + "=" * 60)
-                print("STARTING AUTOMATIC DATABASE OPTIMIZATION")
+                print("DATABASE OPTIMIZATION COMPLETE!")
+                print("=" * 60)
+                print(f"Optimization Results:")
+                print(f"   • Converted fingerprints: {optimization_result['converted_fingerprints']:,}")
+                if optimization_result['rebuilt_lookup_index']:
+                    print(f"   • Lookup index rebuilt as covering index")
+                print(f"   • Size before: {optimization_result['size_before'] / (1024*1024):.1f} MB")
+                print(f"   • Size after: {optimization_result['size_after'] / (1024*1024):.1f} MB")
+                print(f"   • Space saved: {optimization_result['size_reduction'] / (1024*1024):.1f} MB")
+                print(f"   • Size reduction: {optimization_result['reduction_percent']:.1f}%")
+                print(f"   • Bytes per fingerprint: "
+                      f"{optimization_result['size_after'] / optimization_result['total_fingerprints']:.1f}")
+                print("Database is now optimized for better performance!")
                 print("=" * 60)
-                
-                # Perform optimization
-                optimization_result = db_manager.optimize_database()
-                
-                if optimization_result['optimized']:
-                    print("\n" + "=" * 60)
-                    print("DATABASE OPTIMIZATION COMPLETE!")
-                    print("=" * 60)
-                    print(f"Optimization Results:")
-                    print(f"   • Converted fingerprints: {optimization_result['converted_fingerprints']:,}")
-                    print(f"   • Size before: {optimization_result['size_before'] / (1024*1024):.1f} MB")
-                    print(f"   • Size after: {optimization_result['size_after'] / (1024*1024):.1f} MB")
-                    print(f"   • Space saved: {optimization_result['size_reduction'] / (1024*1024):.1f} MB")
-                    print(f"   • Size reduction: {optimization_result['reduction_percent']:.1f}%")
-                    print("Database is now optimized for better performance!")
-                    print("=" * 60)
-                else:
-                    print(f"Optimization not performed: {optimization_result.get('reason', 'Unknown reason')}")
             else:
-                print("Skipping database optimization. You can run it later if needed.")
-                
-        except (EOFError, KeyboardInterrupt):
-            print("\nSkipping database optimization.")
+                print(f"Optimization not performed: {optimization_result.get('reason', 'Unknown reason')}")
+        else:
+            print("Skipping database optimization. You can run it later if needed.")
     else:
         print("Database is already optimized!")
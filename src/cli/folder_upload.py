@@ -9,14 +9,50 @@ Project: Hocus Pocus
 """
 
 import os
+import re
+import sys
+import json
+import time
+import mmap
+import shutil
+import hashlib
+import threading
 import config
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from src.core.engine import Engine
-from src.cli.interface import display_upload_summary
+from src.cli.interface import display_upload_summary, prompt_choice
 from src.cli.database_optimizer import check_and_optimize_database
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
+try:
+    import blake3  # Optional: several times faster than SHA-256 (hocus-pocus[performance])
+except ImportError:
+    blake3 = None
 
-def perform_folder_upload(shazam_engine: Engine) -> bool:
+
+# Scanning menu answers mapped to (recursive flag, confirmation message)
+_SCAN_CHOICES = {
+    '1': (False, "Selected: Current folder only"),
+    '2': (True, "Selected: Recursive scanning (includes all subdirectories)"),
+    '3': (None, "Upload cancelled")
+}
+
+# Seconds to wait for the subdirectory scan before showing the scanning menu
+_SCAN_ESTIMATE_WAIT = 0.5
+
+# Accepted answers to the upload confirmation prompt
+_CONFIRM_CHOICES = {'yes': True, 'y': True, 'no': False, 'n': False}
+
+# Parent folder names that say nothing about the artist
+_NON_ARTIST_FOLDERS = frozenset({'music', 'songs', 'tracks', 'audio'})
+
+# Filename patterns: "Artist - Title", or "Title feat. Guest" / "Title (feat. Guest)";
+# a plain " feat. " anywhere takes precedence over " (feat. "
+_TITLE_RE = re.compile(r'(?:(?P<artist>.*?) - (?P<title>.*)|(?P<base>.*?)(?: feat\. |(?!.* feat\. ) \(feat\. ).*)\Z', re.DOTALL)
+
+
+def perform_folder_upload(shazam_engine: Engine) -> Optional[Dict[str, Any]]:
     """
     Handle folder upload process with user-friendly interface.
     
@@ -24,7 +60,7 @@ def perform_folder_upload(shazam_engine: Engine) -> bool:
         shazam_engine: Initialized Engine instance.
         
     Returns:
-        True if upload was successful, False otherwise.
+        Upload delta from execute_bulk_upload if successful, None otherwise.
     """
     try:
         print("\n" + "=" * 60)
@@ -34,38 +70,58 @@ def perform_folder_upload(shazam_engine: Engine) -> bool:
         # Get folder path from user
         folder_path = get_folder_path()
         if not folder_path:
-            return False
+            return None
+        
+        # Read the root folder now and walk subdirectories in the background
+        # while the scanning menu is shown
+        print(f"Scanning '{folder_path}'...")
+        folder_analysis, root_audio_files, pending_dirs = _scan_root(folder_path)
+        subdirectory_scan = _BackgroundSubdirectoryScan(folder_path, pending_dirs) if pending_dirs else None
         
-        # Analyze folder structure
-        folder_analysis = analyze_folder_structure(folder_path)
+        # Small trees usually finish within a moment, so the menu can show exact totals
+        if subdirectory_scan is None or subdirectory_scan.wait(timeout=_SCAN_ESTIMATE_WAIT):
+            nested_count = len(subdirectory_scan.nested_audio_files) if subdirectory_scan else 0
+            folder_analysis.estimated_total_audio_files = len(root_audio_files) + nested_count
+            folder_analysis.max_depth = subdirectory_scan.max_depth if subdirectory_scan else 0
+        else:
+            folder_analysis.estimated_total_audio_files = None  # Still counting
+            folder_analysis.max_depth = None
         
         # Determine scanning method
         recursive = choose_scanning_method(folder_path, folder_analysis)
+        if not recursive and subdirectory_scan is not None:
+            subdirectory_scan.stop()
         if recursive is None:  # User cancelled
-            return False
+            return None
         
         # Get supported audio files
-        audio_files = get_audio_files(folder_path, recursive)
+        if recursive and subdirectory_scan is not None:
+            if not subdirectory_scan.wait(timeout=0):
+                print("Finishing scan of subdirectories...")
+                subdirectory_scan.wait()
+            audio_files = sorted(root_audio_files + subdirectory_scan.nested_audio_files)
+        else:
+            audio_files = root_audio_files
         if not audio_files:
             print(f"No supported audio files found in '{folder_path}'")
             if recursive:
                 print("No audio files found in this folder or any subdirectories")
             print(f"Supported formats: {', '.join(sorted(config.SUPPORTED_AUDIO_FORMATS))}")
-            return False
+            return None
         
         total_files = len(audio_files)
         print(f"\nFound {total_files} audio files to process...")
         
         # Confirm upload
         if not confirm_upload(total_files, folder_path, recursive):
-            return False
+            return None
         
         # Perform bulk upload
         return execute_bulk_upload(shazam_engine, audio_files, folder_path)
         
     except Exception as e:
         print(f"\nError during folder upload: {e}")
-        return False
+        return None
 
 
 def get_folder_path() -> str:
@@ -113,72 +169,186 @@ def get_folder_path() -> str:
             return ""
 
 
-def analyze_folder_structure(folder_path: str) -> Dict[str, Any]:
+@dataclass
+class FolderAnalysis:
     """
-    Analyze folder structure to help user decide between recursive and non-recursive scanning.
+    Structure of an upload folder, shown when choosing the scanning method.
+    
+    estimated_total_audio_files and max_depth are None while the
+    subdirectories are still being counted.
+    """
+    has_subdirectories: bool = False
+    subdirectory_count: int = 0
+    subdirectory_names: List[str] = field(default_factory=list)
+    files_in_root: int = 0
+    audio_files_in_root: int = 0
+    estimated_total_audio_files: Optional[int] = 0
+    max_depth: Optional[int] = 0
+
+
+def _scan_root(folder_path: str) -> Tuple[FolderAnalysis, List[str], List[Tuple[str, int]]]:
+    """
+    Read the root directory of an upload folder.
     
     Args:
-        folder_path: Path to the folder to analyze.
+        folder_path: Path to the folder to scan.
         
     Returns:
-        Dictionary with folder analysis results.
-    """
-    analysis = {
-        'has_subdirectories': False,
-        'subdirectory_count': 0,
-        'subdirectory_names': [],
-        'files_in_root': 0,
-        'audio_files_in_root': 0,
-        'estimated_total_audio_files': 0,
-        'max_depth': 0
-    }
+        Tuple of (analysis, root_audio_files, pending_dirs), where the analysis
+        covers the root only and pending_dirs holds (path, depth) pairs for
+        the subdirectories still to be walked.
+    """
+    analysis = FolderAnalysis()
+    root_audio_files = []
+    subdirs = []
+    pending_dirs = []
+    audio_suffixes = config.SUPPORTED_AUDIO_SUFFIXES
     
     try:
-        # Analyze root directory
-        root_items = os.listdir(folder_path)
-        subdirs = []
-        
-        for item in root_items:
-            item_path = os.path.join(folder_path, item)
-            if os.path.isfile(item_path):
-                analysis['files_in_root'] += 1
-                _, ext = os.path.splitext(item.lower())
-                if ext in config.SUPPORTED_AUDIO_FORMATS:
-                    analysis['audio_files_in_root'] += 1
-            elif os.path.isdir(item_path):
-                subdirs.append(item)
-        
-        if subdirs:
-            analysis['has_subdirectories'] = True
-            analysis['subdirectory_count'] = len(subdirs)
-            analysis['subdirectory_names'] = sorted(subdirs)
-        
-        # Quick recursive scan to estimate total files and depth
-        if analysis['has_subdirectories']:
-            total_audio_files = 0
-            max_depth = 0
-            
-            for root, dirs, files in os.walk(folder_path):
-                depth = root.replace(folder_path, '').count(os.sep)
-                max_depth = max(max_depth, depth)
-                
-                for filename in files:
-                    _, ext = os.path.splitext(filename.lower())
-                    if ext in config.SUPPORTED_AUDIO_FORMATS:
-                        total_audio_files += 1
-            
-            analysis['estimated_total_audio_files'] = total_audio_files
-            analysis['max_depth'] = max_depth
-        else:
-            analysis['estimated_total_audio_files'] = analysis['audio_files_in_root']
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    analysis.files_in_root += 1
+                    if entry.name.lower().endswith(audio_suffixes):
+                        root_audio_files.append(entry.path)
+                elif entry.is_dir():
+                    subdirs.append(entry.name)
+                    # Like os.walk, do not descend into symlinked directories
+                    if not entry.is_symlink():
+                        pending_dirs.append((entry.path, 1))
+    except OSError as e:
+        print(f"Error scanning folder: {e}")
     
-    except Exception as e:
-        print(f"Error analyzing folder structure: {e}")
+    if subdirs:
+        analysis.has_subdirectories = True
+        analysis.subdirectory_count = len(subdirs)
+        analysis.subdirectory_names = sorted(subdirs)
+    
+    root_audio_files.sort()
+    analysis.audio_files_in_root = len(root_audio_files)
+    analysis.estimated_total_audio_files = len(root_audio_files)
+    
+    return analysis, root_audio_files, pending_dirs
+
+
+def _scan_subdirectories(folder_path: str, pending_dirs: List[Tuple[str, int]],
+                         nested_audio_files: List[str], stop_event: Optional[threading.Event] = None,
+                         show_progress: bool = True) -> int:
+    """
+    Walk subdirectories with an explicit stack, collecting audio files and tracking depth.
+    
+    Args:
+        folder_path: Upload folder, used for progress messages.
+        pending_dirs: (path, depth) pairs to walk; consumed by the walk.
+        nested_audio_files: List that found audio files are appended to.
+        stop_event: When set, the walk stops before the next directory.
+        show_progress: Whether to print progress for large directory structures.
+        
+    Returns:
+        Maximum directory depth reached.
+    """
+    max_depth = 0
+    audio_suffixes = config.SUPPORTED_AUDIO_SUFFIXES
+    
+    while pending_dirs:
+        if stop_event is not None and stop_event.is_set():
+            break
+        
+        dir_path, depth = pending_dirs.pop()
+        max_depth = max(max_depth, depth)
+        
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            pending_dirs.append((entry.path, depth + 1))
+                    elif entry.name.lower().endswith(audio_suffixes):
+                        nested_audio_files.append(entry.path)
+        except OSError:
+            # Skip unreadable subdirectories, as os.walk does
+            continue
+        
+        # Show progress for large directory structures
+        if show_progress and nested_audio_files and len(nested_audio_files) % 100 == 0:
+            relative_path = os.path.relpath(dir_path, folder_path)
+            print(f"   Scanning: {relative_path}/ ({len(nested_audio_files)} files found so far)")
     
-    return analysis
+    return max_depth
 
 
-def choose_scanning_method(folder_path: str, folder_analysis: Dict[str, Any]) -> bool:
+def scan_folder(folder_path: str, recursive: bool = True) -> Tuple[FolderAnalysis, List[str], List[str]]:
+    """
+    Scan a folder once, collecting both the structure analysis and the audio files.
+    
+    Uses os.scandir so file/directory checks come from the cached directory
+    entries instead of a separate stat() per item.
+    
+    Args:
+        folder_path: Path to the folder to scan.
+        recursive: If False, only the root directory is read and the depth
+                   and total estimates cover the root only.
+        
+    Returns:
+        Tuple of (analysis, root_audio_files, all_audio_files), where both file
+        lists are sorted and all_audio_files includes subdirectories.
+    """
+    analysis, root_audio_files, pending_dirs = _scan_root(folder_path)
+    nested_audio_files = []
+    
+    if recursive:
+        analysis.max_depth = _scan_subdirectories(folder_path, pending_dirs, nested_audio_files)
+    
+    analysis.estimated_total_audio_files = len(root_audio_files) + len(nested_audio_files)
+    all_audio_files = sorted(root_audio_files + nested_audio_files)
+    
+    return analysis, root_audio_files, all_audio_files
+
+
+class _BackgroundSubdirectoryScan:
+    """
+    Recursive part of a folder scan running on a background thread.
+    
+    Lets the scanning-method menu appear as soon as the root directory has
+    been read; the subdirectory walk is only waited for if the user actually
+    chooses a recursive upload, and is stopped otherwise.
+    """
+    
+    def __init__(self, folder_path: str, pending_dirs: List[Tuple[str, int]]):
+        self.nested_audio_files = []
+        self.max_depth = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(folder_path, pending_dirs), daemon=True)
+        self._thread.start()
+    
+    def _run(self, folder_path: str, pending_dirs: List[Tuple[str, int]]) -> None:
+        self.max_depth = _scan_subdirectories(folder_path, pending_dirs, self.nested_audio_files,
+                                              stop_event=self._stop_event, show_progress=False)
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the walk to finish; returns True if it has."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+    
+    def stop(self) -> None:
+        """Ask the walk to stop before its next directory."""
+        self._stop_event.set()
+
+
+def analyze_folder_structure(folder_path: str) -> FolderAnalysis:
+    """
+    Analyze folder structure to help user decide between recursive and non-recursive scanning.
+    
+    Args:
+        folder_path: Path to the folder to analyze.
+        
+    Returns:
+        FolderAnalysis with the folder analysis results.
+    """
+    return scan_folder(folder_path)[0]
+
+
+def choose_scanning_method(folder_path: str, folder_analysis: FolderAnalysis) -> bool:
     """
     Let user choose between recursive and non-recursive scanning based on folder analysis.
     
@@ -193,51 +363,77 @@ def choose_scanning_method(folder_path: str, folder_analysis: Dict[str, Any]) ->
     print("=" * 50)
     
     # Display folder structure information
-    if folder_analysis['has_subdirectories']:
-        print(f"Root directory: {folder_analysis['audio_files_in_root']} audio files")
-        print(f"Subdirectories: {folder_analysis['subdirectory_count']} found")
-        print(f"Total audio files (with subdirectories): ~{folder_analysis['estimated_total_audio_files']}")
-        print(f"Directory depth: {folder_analysis['max_depth']} levels deep")
+    if folder_analysis.has_subdirectories:
+        print(f"Root directory: {folder_analysis.audio_files_in_root} audio files")
+        print(f"Subdirectories: {folder_analysis.subdirectory_count} found")
+        estimated_total = folder_analysis.estimated_total_audio_files
+        if estimated_total is None:
+            print("Total audio files (with subdirectories): still counting in the background...")
+        else:
+            print(f"Total audio files (with subdirectories): ~{estimated_total}")
+            print(f"Directory depth: {folder_analysis.max_depth} levels deep")
         
         # Show some subdirectory names
-        if folder_analysis['subdirectory_names']:
+        if folder_analysis.subdirectory_names:
             print(f"\nSample subdirectories:")
-            for i, subdir in enumerate(folder_analysis['subdirectory_names'][:5]):
+            for i, subdir in enumerate(folder_analysis.subdirectory_names[:5]):
                 print(f"   • {subdir}")
-            if len(folder_analysis['subdirectory_names']) > 5:
-                print(f"   ... and {len(folder_analysis['subdirectory_names']) - 5} more")
+            if len(folder_analysis.subdirectory_names) > 5:
+                print(f"   ... and {len(folder_analysis.subdirectory_names) - 5} more")
         
         print(f"\nScanning Options:")
-        print(f"1. Current folder only ({folder_analysis['audio_files_in_root']} files)")
-        print(f"2. Recursive (all subdirectories, ~{folder_analysis['estimated_total_audio_files']} files)")
+        print(f"1. Current folder only ({folder_analysis.audio_files_in_root} files)")
+        if estimated_total is None:
+            print(f"2. Recursive (all subdirectories, still counting)")
+        else:
+            print(f"2. Recursive (all subdirectories, ~{estimated_total} files)")
         print(f"3. Cancel upload")
         
-        while True:
-            try:
-                choice = input(f"\nChoose scanning method (1/2/3): ").strip()
-                
-                if choice == '1':
-                    print("Selected: Current folder only")
-                    return False  # Non-recursive
-                elif choice == '2':
-                    print("Selected: Recursive scanning (includes all subdirectories)")
-                    return True   # Recursive
-                elif choice == '3':
-                    print("Upload cancelled")
-                    return None   # Cancelled
-                else:
-                    print("Please enter 1, 2, or 3")
-                    
-            except (EOFError, KeyboardInterrupt):
-                print("\nUpload cancelled")
-                return None
+        recursive, message = prompt_choice("\nChoose scanning method (1/2/3): ", _SCAN_CHOICES,
+                                           "Please enter 1, 2, or 3", interrupted=_SCAN_CHOICES['3'])
+        print(message)
+        return recursive  # None means cancelled
     else:
         # No subdirectories, just scan current folder
-        print(f"Single directory: {folder_analysis['audio_files_in_root']} audio files")
+        print(f"Single directory: {folder_analysis.audio_files_in_root} audio files")
         print("No subdirectories found - will scan current folder only")
         return False  # Non-recursive
 
 
+def iter_audio_files(folder_path: str, recursive: bool = False) -> Iterator[str]:
+    """
+    Yield supported audio files from the specified folder as they are found.
+    
+    Paths come out in directory order rather than sorted, so a consumer such
+    as Engine.extract_fingerprints_parallel() can start on the first files
+    while the rest of the tree is still being read.
+    
+    Args:
+        folder_path: Path to the folder to scan.
+        recursive: If True, scan subdirectories recursively (without
+                   following symlinked directories, like os.walk).
+        
+    Yields:
+        Audio file paths.
+    """
+    pending_dirs = [folder_path]
+    audio_suffixes = config.SUPPORTED_AUDIO_SUFFIXES
+    
+    while pending_dirs:
+        dir_path = pending_dirs.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if recursive and not entry.is_symlink():
+                            pending_dirs.append(entry.path)
+                    elif entry.name.lower().endswith(audio_suffixes) and entry.is_file():
+                        yield entry.path
+        except OSError:
+            # Skip unreadable directories, as os.walk does
+            continue
+
+
 def get_audio_files(folder_path: str, recursive: bool = False) -> List[str]:
     """
     Get all supported audio files from the specified folder.
@@ -247,42 +443,9 @@ def get_audio_files(folder_path: str, recursive: bool = False) -> List[str]:
         recursive: If True, scan subdirectories recursively.
         
     Returns:
-        List of audio file paths.
+        Sorted list of audio file paths.
     """
-    audio_files = []
-    
-    try:
-        if recursive:
-            # Recursive scanning using os.walk
-            print(f"Scanning '{folder_path}' recursively...")
-            for root, dirs, files in os.walk(folder_path):
-                for filename in files:
-                    file_path = os.path.join(root, filename)
-                    _, ext = os.path.splitext(filename.lower())
-                    if ext in config.SUPPORTED_AUDIO_FORMATS:
-                        audio_files.append(file_path)
-                        
-                # Show progress for large directory structures
-                if len(audio_files) % 100 == 0 and len(audio_files) > 0:
-                    relative_path = os.path.relpath(root, folder_path)
-                    if relative_path != '.':
-                        print(f"   Scanning: {relative_path}/ ({len(audio_files)} files found so far)")
-        else:
-            # Non-recursive scanning (current directory only)
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-                if os.path.isfile(file_path):
-                    _, ext = os.path.splitext(filename.lower())
-                    if ext in config.SUPPORTED_AUDIO_FORMATS:
-                        audio_files.append(file_path)
-        
-        # Sort files for consistent processing order
-        audio_files.sort()
-        return audio_files
-        
-    except Exception as e:
-        print(f"Error scanning folder: {e}")
-        return []
+    return sorted(iter_audio_files(folder_path, recursive))
 
 
 def confirm_upload(total_files: int, folder_path: str, recursive: bool = False) -> bool:
@@ -308,22 +471,180 @@ def confirm_upload(total_files: int, folder_path: str, recursive: bool = False)
     print(f"   • Add songs to your database")
     print(f"   • Automatically optimize the database afterward")
     
-    while True:
-        try:
-            choice = input(f"\nContinue with upload? (yes/no): ").strip().lower()
-            if choice in ['yes', 'y']:
-                return True
-            elif choice in ['no', 'n']:
-                print("Upload cancelled.")
-                return False
-            else:
-                print("Please enter 'yes' or 'no'")
-        except (EOFError, KeyboardInterrupt):
-            print("\nUpload cancelled.")
-            return False
+    confirmed = prompt_choice("\nContinue with upload? (yes/no): ", _CONFIRM_CHOICES,
+                              "Please enter 'yes' or 'no'", interrupted=False)
+    if not confirmed:
+        print("Upload cancelled.")
+    return confirmed
+
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Compute a content hash of a file for duplicate detection.
+    
+    The file is memory-mapped rather than read into Python buffers, and the
+    pages it leaves in the OS cache are reused when ffmpeg decodes the file.
+    BLAKE3 is used when installed, SHA-256 otherwise.
+    
+    Args:
+        file_path: Path to the file to hash.
+        
+    Returns:
+        Hex digest of the file contents.
+    """
+    content_hash = blake3.blake3() if blake3 is not None else hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        # Empty files cannot be memory-mapped
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                content_hash.update(contents)
+    return content_hash.hexdigest()
+
+
+def _describe_parent_folder(parent_path: str) -> Tuple[str, str]:
+    """
+    Derive the folder-based artist and the display prefix for a relative parent path.
+    
+    Args:
+        parent_path: Parent directory relative to the upload folder ('' for the root).
+        
+    Returns:
+        Tuple of (artist, display_path), where display_path is '' for the root.
+    """
+    if not parent_path:
+        return "Unknown Artist", ""
+    
+    path_parts = parent_path.split(os.sep)
+    
+    # Use parent folder as potential artist/genre info
+    parent_folder = path_parts[-1]
+    artist = "Unknown Artist" if parent_folder.lower() in _NON_ARTIST_FOLDERS else parent_folder
+    return artist, "/".join(path_parts) + "/"
+
+
+def _try_compute_file_hash(file_path: str) -> Optional[str]:
+    """Return the content hash of a file, or None if it cannot be read."""
+    try:
+        return compute_file_hash(file_path)
+    except (OSError, ValueError):
+        return None
+
+
+class _UploadProgressLog:
+    """
+    Per-file upload log for redirected output.
+    
+    Lines are buffered and written together with a progress block every few
+    files (about 100 blocks for large uploads); failures are written at once.
+    """
+    
+    def __init__(self, total_files: int):
+        self.total_files = total_files
+        self.interval = max(10, total_files // 100)
+        self._pending = []
+    
+    def report(self, index: int, file_path: str, label: str, status: str, song_id: Optional[int],
+               error: Optional[Exception], successful_imports: int, failed_imports: int) -> None:
+        """Record the outcome of one file."""
+        failed = error is not None
+        self._pending.append(f"[{index:2d}/{self.total_files}] {label}\n    {status}\n")
+        
+        at_block = index % self.interval == 0
+        if at_block:
+            self._pending.append(f"\n--- Progress: {index}/{self.total_files} files processed ---\n"
+                                 f"    Successful: {successful_imports}\n"
+                                 f"    Failed: {failed_imports}\n\n")
+        if failed or at_block:
+            self.close()
+    
+    def close(self) -> None:
+        """Write any buffered lines."""
+        sys.stdout.write("".join(self._pending))
+        sys.stdout.flush()
+        self._pending.clear()
+
+
+class _UploadProgressLine:
+    """
+    Single upload status line rewritten in place, for terminals.
+    
+    Redraws are throttled to about ten per second so terminal output stays
+    constant per second however fast files complete; failures are printed
+    as regular lines above the status line.
+    """
+    
+    def __init__(self, total_files: int, min_interval: float = 0.1):
+        self.total_files = total_files
+        self.min_interval = min_interval
+        self._last_draw = 0.0
+        self._width = 0  # Length of the status line currently on screen
+    
+    def report(self, index: int, file_path: str, label: str, status: str, song_id: Optional[int],
+               error: Optional[Exception], successful_imports: int, failed_imports: int) -> None:
+        """Record the outcome of one file."""
+        failed = error is not None
+        if failed:
+            self._clear()
+            sys.stdout.write(f"[{index}/{self.total_files}] {label}\n    {status}\n")
+        
+        now = time.monotonic()
+        if failed or index == self.total_files or now - self._last_draw >= self.min_interval:
+            percent = 100 * index // self.total_files
+            self._draw(f"[{index}/{self.total_files}] {percent}%  added: {successful_imports}  "
+                       f"failed: {failed_imports}  {label}")
+            self._last_draw = now
+    
+    def close(self) -> None:
+        """End the status line."""
+        if self._width:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+            self._width = 0
+    
+    def _draw(self, text: str) -> None:
+        # Stay within one terminal row so that \r returns to the line start
+        text = text[:shutil.get_terminal_size().columns - 1]
+        sys.stdout.write("\r" + text.ljust(self._width))
+        sys.stdout.flush()
+        self._width = len(text)
+    
+    def _clear(self) -> None:
+        if self._width:
+            sys.stdout.write("\r" + " " * self._width + "\r")
+            self._width = 0
+
+
+class _UploadReportJson:
+    """
+    Machine-readable upload report: one JSON object per file on stderr.
+    
+    Used when the engine is in quiet mode; successful files are reported as
+    {"i", "path", "id"}, failed ones as {"i", "path", "error"} and copies of a
+    file added earlier in the upload as {"i", "path", "duplicate"}.
+    """
+    
+    def __init__(self, total_files: int):
+        self.total_files = total_files
+    
+    def report(self, index: int, file_path: str, label: str, status: str, song_id: Optional[int],
+               error: Optional[Exception], successful_imports: int, failed_imports: int) -> None:
+        """Record the outcome of one file."""
+        record = {'i': index, 'path': file_path}
+        if error is not None:
+            record['error'] = str(error)
+        elif song_id is None:
+            record['duplicate'] = True
+        else:
+            record['id'] = song_id
+        sys.stderr.write(json.dumps(record) + '\n')
+    
+    def close(self) -> None:
+        """Flush the report."""
+        sys.stderr.flush()
 
 
-def execute_bulk_upload(shazam_engine: Engine, audio_files: List[str], folder_path: str) -> bool:
+def execute_bulk_upload(shazam_engine: Engine, audio_files: List[str], 
+                        folder_path: str) -> Optional[Dict[str, Any]]:
     """
     Execute the bulk upload process.
     
@@ -333,78 +654,161 @@ def execute_bulk_upload(shazam_engine: Engine, audio_files: List[str], folder_pa
         folder_path: Source folder path for display.
         
     Returns:
-        True if upload was successful, False otherwise.
+        Dictionary with 'songs_added' and 'fingerprints_added' if at least one
+        song was imported, None otherwise.
     """
     print(f"\nStarting bulk upload from '{folder_path}'...")
+    
+    # Skip files whose exact contents are already in the database; copies within
+    # this upload are skipped once one of them has been stored
+    print("Checking for files already in the database...")
+    known_hashes = shazam_engine.db_manager.get_ingested_hashes()
+    file_hashes = {}
+    files_to_process = []
+    skipped_duplicates = 0
+    
+    # Hash several files at once: both hashers release the GIL, so reads and
+    # hashing overlap instead of waiting on the disk one file at a time
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as hash_executor:
+        content_hashes = list(hash_executor.map(_try_compute_file_hash, audio_files))
+    
+    for file_path, content_hash in zip(audio_files, content_hashes):
+        if content_hash is None:
+            # Let the extraction step report unreadable files
+            files_to_process.append(file_path)
+            continue
+        
+        if content_hash in known_hashes:
+            skipped_duplicates += 1
+            continue
+        
+        # Copies within this upload are all kept: a hash only counts as known
+        # once a copy has been stored, so a failed first copy does not hide the rest
+        file_hashes[file_path] = content_hash
+        files_to_process.append(file_path)
+    
+    if skipped_duplicates:
+        print(f"Skipping {skipped_duplicates} duplicate files already in the database")
+    
     print("Processing files (this may take a while)...\n")
     
-    total_files = len(audio_files)
+    total_files = len(files_to_process)
     successful_imports = 0
     failed_imports = 0
+    fingerprints_added = 0
     
-    for i, file_path in enumerate(audio_files, 1):
-        # Get relative path for better display in nested structures
-        relative_path = os.path.relpath(file_path, folder_path)
-        filename = os.path.basename(file_path)
-        
-        # Extract title from filename (remove extension)
-        title = os.path.splitext(filename)[0]
-        
-        # Enhanced artist/title extraction for nested folders
-        artist = "Unknown Artist"
-        
-        # Try to extract artist from folder structure
-        path_parts = relative_path.split(os.sep)
-        if len(path_parts) > 1:
-            # Use parent folder as potential artist/genre info
-            parent_folder = path_parts[-2]
-            if not parent_folder.lower() in ['music', 'songs', 'tracks', 'audio']:
-                artist = parent_folder
-        
-        # Override with filename-based artist extraction if available
-        if " - " in title:
-            parts = title.split(" - ", 1)
-            if len(parts) == 2:
-                artist, title = parts[0].strip(), parts[1].strip()
-        elif " feat. " in title:
-            title = title.split(" feat. ")[0].strip()
-        elif " (feat. " in title:
-            title = title.split(" (feat. ")[0].strip()
-        
-        # Display progress with relative path for nested structures
-        if len(path_parts) > 1:
-            display_path = "/".join(path_parts[:-1]) + "/"
-            print(f"[{i:2d}/{total_files}] {display_path}{title}")
-        else:
-            print(f"[{i:2d}/{total_files}] Processing: {title}")
+    # Quiet mode reports JSON lines; terminals get a single status line rewritten
+    # in place; redirected output keeps the per-file log with periodic progress blocks
+    quiet = shazam_engine.quiet
+    if quiet:
+        progress = _UploadReportJson(total_files)
+    elif sys.stdout.isatty():
+        progress = _UploadProgressLine(total_files)
+    else:
+        progress = _UploadProgressLog(total_files)
+    
+    # Scanned paths all start with the folder path, so relative paths are a slice;
+    # loop invariants are bound to locals once
+    folder_prefix = os.path.join(folder_path, '')
+    prefix_length = len(folder_prefix)
+    path_separator = os.sep
+    match_title = _TITLE_RE.match
+    
+    # Files in the same folder share the folder-based artist and display prefix
+    parent_folder_cache = {}
+    
+    # Write songs in large transactions instead of committing per file, committing
+    # every BULK_COMMIT_INTERVAL songs so an interrupted upload keeps its progress
+    with shazam_engine.bulk_transaction():
+        # Audio analysis runs in worker processes; results arrive in file order and
+        # are written to the database from this process
+        extraction_results = shazam_engine.extract_fingerprints_parallel(files_to_process)
         
-        try:
-            # Add song to database (processes audio and creates fingerprints)
-            song_id = shazam_engine.add_song_to_database(
-                file_path=file_path,
-                title=title,
-                artist=artist
-            )
+        for i, (file_path, duration, fingerprints, error) in enumerate(extraction_results, 1):
+            # Get relative path for better display in nested structures
+            if file_path.startswith(folder_prefix):
+                relative_path = file_path[prefix_length:]
+            else:
+                relative_path = os.path.relpath(file_path, folder_path)
+            parent_path, _, filename = relative_path.rpartition(path_separator)
+            
+            # Extract title from filename (remove extension)
+            title = os.path.splitext(filename)[0]
+            
+            # Enhanced artist/title extraction for nested folders
+            folder_info = parent_folder_cache.get(parent_path)
+            if folder_info is None:
+                folder_info = parent_folder_cache[parent_path] = _describe_parent_folder(parent_path)
+            artist, display_path = folder_info
             
-            print(f"    Successfully added (Song ID: {song_id})")
-            successful_imports += 1
+            # Override with filename-based artist extraction if available
+            title_match = match_title(title)
+            if title_match is not None:
+                if title_match.group('title') is not None:
+                    artist = title_match.group('artist').strip()
+                    title = title_match.group('title').strip()
+                else:
+                    title = title_match.group('base').strip()
+            
+            # Display progress with relative path for nested structures
+            label = f"{display_path}{title}" if display_path else f"Processing: {title}"
             
-        except Exception as e:
-            print(f"    Failed: {str(e)}")
-            failed_imports += 1
+            song_id = None
+            content_hash = file_hashes.get(file_path)
+            if error is not None:
+                status = f"Failed: {error}"
+            elif content_hash is not None and content_hash in known_hashes:
+                status = "Skipped: duplicate of a file added in this upload"
+                skipped_duplicates += 1
+            else:
+                try:
+                    # Store the song and its fingerprints in the database
+                    song_id = shazam_engine.store_song(file_path, title, artist, duration, fingerprints,
+                                                       content_hash=content_hash)
+                    if content_hash is not None:
+                        known_hashes.add(content_hash)
+                    
+                    status = f"Successfully added (Song ID: {song_id}, {len(fingerprints):,} fingerprints)"
+                    successful_imports += 1
+                    fingerprints_added += len(fingerprints)
+                    
+                    if successful_imports % config.BULK_COMMIT_INTERVAL == 0:
+                        shazam_engine.commit_bulk_transaction()
+                    
+                except Exception as e:
+                    error = e
+                    status = f"Failed: {str(e)}"
+            
+            if error is not None:
+                failed_imports += 1
+            progress.report(i, file_path, label, status, song_id, error, successful_imports, failed_imports)
         
-        # Show progress every 10 songs
-        if i % 10 == 0:
-            print(f"\n--- Progress: {i}/{total_files} files processed ---")
-            print(f"    Successful: {successful_imports}")
-            print(f"    Failed: {failed_imports}\n")
+        progress.close()
+    
     
     # Display upload summary
-    display_upload_summary(total_files, successful_imports, failed_imports, folder_path, shazam_engine)
+    if quiet:
+        sys.stderr.write(json.dumps({'summary': {
+            'folder': folder_path,
+            'total_files': len(audio_files),
+            'songs_added': successful_imports,
+            'failed': failed_imports,
+            'skipped_duplicates': skipped_duplicates,
+            'fingerprints_added': fingerprints_added
+        }}) + '\n')
+    else:
+        display_upload_summary(len(audio_files), successful_imports, failed_imports, folder_path, 
+                               fingerprints_added, skipped_duplicates)
     
     # Automatically optimize database after upload
     if successful_imports > 0:
         print("\nPerforming automatic database optimization after upload...")
         check_and_optimize_database(shazam_engine)
     
-    return successful_imports > 0
+    if successful_imports == 0:
+        return None
+    
+    return {
+        'songs_added': successful_imports,
+        'fingerprints_added': fingerprints_added
+    }
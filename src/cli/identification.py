@@ -9,6 +9,7 @@ Project: Hocus Pocus
 """
 
 import time
+import config
 from src.core.engine import Engine
 from src.cli.interface import display_identification_results
 from typing import Dict, Any
@@ -25,11 +26,16 @@ def perform_audio_identification(shazam_engine: Engine) -> bool:
         True if identification was successful, False otherwise.
     """
     try:
+        # Open the microphone while the countdown runs
+        shazam_engine.arm_recording()
+        
         # Countdown for recording preparation
-        print("\nStarting audio recording in 3 seconds...")
-        for i in range(3, 0, -1):
-            print(f"{i}...")
-            time.sleep(1)
+        countdown = config.RECORDING_COUNTDOWN
+        if countdown > 0:
+            print(f"\nStarting audio recording in {countdown} seconds...")
+            for i in range(countdown, 0, -1):
+                print(f"{i}...")
+                time.sleep(1)
         
         print("RECORDING NOW! Play your song loud and clear...")
         
@@ -44,8 +50,8 @@ def perform_audio_identification(shazam_engine: Engine) -> bool:
         print(f"Generated {fingerprint_count:,} fingerprints")
         print("Searching database for matches...")
         
-        # Perform identification
-        identification_result = shazam_engine.identify_song("output/recorded_audio.wav", max_duration=30.0)
+        # Perform identification on the analysis we already have
+        identification_result = shazam_engine.identify_analysis(analysis_results, max_duration=30.0)
         
         # Display results
         display_identification_results(identification_result)
@@ -8,7 +8,16 @@ Author: Programmer-5090
 Project: Hocus Pocus
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+
+# Accepted answers to the main prompt mapped to their canonical choice
+_CHOICE_MAP = {
+    'y': 'yes', 'yes': 'yes',
+    'n': 'no', 'no': 'no',
+    'u': 'upload', 'upload': 'upload',
+    'q': 'quit', 'quit': 'quit', 'exit': 'quit'
+}
 
 
 def display_welcome_message(database_stats: Dict[str, Any]) -> None:
@@ -32,29 +41,47 @@ def display_welcome_message(database_stats: Dict[str, Any]) -> None:
     print("\n" + "=" * 60)
 
 
-def get_user_choice() -> str:
+def prompt_choice(prompt: str, choices: Dict[str, Any], invalid_message: Optional[str] = None,
+                  interrupted: Any = None, default: Any = None) -> Any:
     """
-    Get user input for identification choice.
+    Ask a question until the answer is one of the accepted choices.
     
+    Args:
+        prompt: Question shown to the user.
+        choices: Accepted lowercase answers mapped to the value to return.
+        invalid_message: Message printed before asking again after an
+                         unrecognized answer. If None, an unrecognized
+                         answer returns default instead of asking again.
+        interrupted: Value returned if input ends or is interrupted (Ctrl+C).
+        default: Value returned for an unrecognized answer when
+                 invalid_message is None.
+        
     Returns:
-        User's choice as a lowercase string ('yes', 'no', 'upload', or 'quit').
+        The value mapped to the user's answer, default, or interrupted.
     """
     while True:
         try:
-            choice = input("\nDo you want to identify the audio? (yes/no/upload/quit): ").strip().lower()
-            if choice in ['yes', 'y', 'no', 'n', 'upload', 'u', 'quit', 'q', 'exit']:
-                if choice in ['y', 'yes']:
-                    return 'yes'
-                elif choice in ['n', 'no']:
-                    return 'no'
-                elif choice in ['u', 'upload']:
-                    return 'upload'
-                elif choice in ['q', 'quit', 'exit']:
-                    return 'quit'
-            else:
-                print("Please enter 'yes', 'no', 'upload', or 'quit'")
+            answer = input(prompt).strip().lower()
         except (EOFError, KeyboardInterrupt):
-            return 'quit'
+            print()
+            return interrupted
+        
+        if answer in choices:
+            return choices[answer]
+        if invalid_message is None:
+            return default
+        print(invalid_message)
+
+
+def get_user_choice() -> str:
+    """
+    Get user input for identification choice.
+    
+    Returns:
+        User's choice as a lowercase string ('yes', 'no', 'upload', or 'quit').
+    """
+    return prompt_choice("\nDo you want to identify the audio? (yes/no/upload/quit): ", _CHOICE_MAP,
+                         "Please enter 'yes', 'no', 'upload', or 'quit'", interrupted='quit')
 
 
 def display_identification_results(result: Dict[str, Any]) -> None:
@@ -114,7 +141,8 @@ def display_session_summary(total_sessions: int, successful_identifications: int
 
 
 def display_upload_summary(total_files: int, successful_imports: int, failed_imports: int, 
-                          folder_path: str, shazam_engine) -> None:
+                          folder_path: str, fingerprints_added: int, 
+                          skipped_duplicates: int = 0) -> None:
     """
     Display the upload summary with statistics.
     
@@ -123,7 +151,9 @@ def display_upload_summary(total_files: int, successful_imports: int, failed_imp
         successful_imports: Number of successful imports.
         failed_imports: Number of failed imports.
         folder_path: Source folder path.
-        shazam_engine: Engine instance for getting final stats.
+        fingerprints_added: Number of fingerprints stored during the upload.
+        skipped_duplicates: Number of files skipped because their contents were
+                            already in the database or added earlier in the upload.
     """
     print("\n" + "=" * 60)
     print("FOLDER UPLOAD SUMMARY")
@@ -132,14 +162,12 @@ def display_upload_summary(total_files: int, successful_imports: int, failed_imp
     print(f"Total files processed: {total_files}")
     print(f"Successfully imported: {successful_imports}")
     print(f"Failed imports: {failed_imports}")
+    if skipped_duplicates:
+        print(f"Skipped duplicates: {skipped_duplicates}")
+    print(f"Fingerprints added: {fingerprints_added:,}")
     
     if total_files > 0:
         success_rate = (successful_imports / total_files) * 100
         print(f"Success rate: {success_rate:.1f}%")
     
-    # Show final database stats
-    stats = shazam_engine.get_database_stats()
-    print(f"\nUpdated database statistics:")
-    print(f"Total songs in database: {stats['total_songs']:,}")
-    print(f"Total fingerprints: {stats['total_fingerprints']:,}")
     print("=" * 60)
@@ -0,0 +1,56 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True
+"""
+Cython build of the constellation pairing kernel.
+
+Mirrors fingerprint_generator._pair_indices_kernel for installations
+without Numba; fingerprint_generator compiles it on first import through
+pyximport when Cython is available (hocus-pocus[performance]).
+"""
+
+import numpy as np
+from libc.stdint cimport int32_t, int64_t
+
+
+def pair_indices(const int32_t[:] times, Py_ssize_t fan_value, int64_t min_delta,
+                 int64_t max_delta):
+    """
+    Anchor and target indices of every pair inside the target zone.
+
+    Args:
+        times: Peak time indices in ascending order (int32, any stride)
+        fan_value: Number of following peaks considered per anchor
+        min_delta: Smallest accepted time difference
+        max_delta: Largest accepted time difference
+
+    Returns:
+        Tuple of (anchor_idx, target_idx) int64 arrays in anchor order, then target order
+    """
+    cdef Py_ssize_t num_peaks = times.shape[0]
+    cdef Py_ssize_t num_pairs = 0
+    cdef Py_ssize_t anchor, target, last, pair
+    cdef int64_t delta_t
+
+    with nogil:
+        for anchor in range(num_peaks):
+            last = min(anchor + fan_value + 1, num_peaks)
+            for target in range(anchor + 1, last):
+                delta_t = times[target] - times[anchor]
+                if min_delta <= delta_t <= max_delta:
+                    num_pairs += 1
+
+    anchor_array = np.empty(num_pairs, dtype=np.int64)
+    target_array = np.empty(num_pairs, dtype=np.int64)
+    cdef int64_t[::1] anchor_idx = anchor_array
+    cdef int64_t[::1] target_idx = target_array
+
+    pair = 0
+    with nogil:
+        for anchor in range(num_peaks):
+            last = min(anchor + fan_value + 1, num_peaks)
+            for target in range(anchor + 1, last):
+                delta_t = times[target] - times[anchor]
+                if min_delta <= delta_t <= max_delta:
+                    anchor_idx[pair] = anchor
+                    target_idx[pair] = target
+                    pair += 1
+    return anchor_array, target_array
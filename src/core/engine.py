@@ -16,13 +16,68 @@ Author: Hocus Pocus Project
 Version: 1.0
 """
 
-from typing import Dict, List, Tuple, Optional, Any
+import logging
+import os
+import numpy as np
+import config
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Iterator
 from ..audio.audio_loader import AudioLoader
 from ..audio.spectrogram_processor import SpectrogramProcessor
-from ..audio.audio_visualizer import AudioVisualizer
-from ..audio.audio_recorder import AudioRecorder
 from .fingerprint_generator import FingerprintGenerator
+from .fingerprint_cache import FingerprintCache
 from ..database.database_manager import DatabaseManager
+from ..database.fingerprint_index import FingerprintIndex
+
+
+# Progress messages go through logging so library and batch callers choose
+# the verbosity; nothing is written unless the application configures it
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+# Processing components installed in each parallel extraction worker process
+_worker_components = None
+
+
+def _init_extraction_worker(audio_loader: AudioLoader, 
+                            spectrogram_processor: SpectrogramProcessor,
+                            fingerprint_generator: FingerprintGenerator) -> None:
+    """
+    Install the processing components in a worker process.
+    
+    Runs once per worker so the components are not re-pickled for every file.
+    Workers always use the CPU spectrogram path: importing torch and setting
+    up CUDA in every (possibly forked) worker costs seconds and GPU memory.
+    """
+    global _worker_components
+    spectrogram_processor.use_gpu = False  # The worker's own unpickled copy
+    _worker_components = (audio_loader, spectrogram_processor, fingerprint_generator)
+
+
+def _extract_fingerprints_worker(file_path: str, sample_rate: int
+                                 ) -> Tuple[Optional[float], Optional[np.ndarray], Optional[str]]:
+    """
+    Decode a file and generate its fingerprints inside a worker process.
+    
+    Only the duration and fingerprints are returned so that the signal and
+    spectrogram never cross the process boundary. Errors are returned as
+    strings rather than raised so that one bad file does not abort a batch.
+    
+    Returns:
+        Tuple of (duration, fingerprints, error_message)
+    """
+    audio_loader, spectrogram_processor, fingerprint_generator = _worker_components
+    try:
+        signal, actual_sample_rate = audio_loader.load_audio_ffmpeg(file_path, sample_rate)
+        S_db, _, _ = spectrogram_processor.compute_spectrogram(signal, actual_sample_rate)
+        peaks = spectrogram_processor.find_peaks(S_db)
+        fingerprints = fingerprint_generator.generate_fingerprints(peaks, sorted_by_time=True)
+        return len(signal) / actual_sample_rate, fingerprints, None
+    except Exception as e:
+        return None, None, str(e)
 
 
 class Engine:
@@ -34,9 +89,12 @@ class Engine:
     to database storage and song matching.
     """
     
+    # Query fingerprints matched per step when matching runs against SQLite
+    MATCH_CHUNK_SIZE = 512
+    
     def __init__(self, fft_size: int = 2048, hop_length: int = 512, 
                  fan_value: int = 5, target_zone: Tuple[int, int] = (1, 20),
-                 db_path: str = None):
+                 db_path: str = None, use_gpu: bool = False, cache_dir: Optional[str] = None):
         """
         Initialize the comprehensive audio identification system.
         
@@ -46,24 +104,59 @@ class Engine:
             fan_value: Number of target peaks to pair with each anchor peak (default: 5)
             target_zone: Time difference range for valid fingerprint pairs (default: (1, 20))
             db_path: Path to the SQLite database file (default: uses config.DATABASE_PATH)
+            use_gpu: Compute spectrograms on a CUDA GPU when available (default: False)
+            cache_dir: Directory for cached fingerprints of analyzed files, so that
+                      adding or identifying an unchanged file again skips the
+                      analysis (default: no caching)
         """
         # Use config database path if none provided
         if db_path is None:
-            import sys
-            import os
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-            import config
             db_path = config.DATABASE_PATH
         
         # Initialize core audio processing components
         self.audio_loader = AudioLoader()
-        self.audio_recorder = AudioRecorder(config.RECORDED_AUDIO_PATH, duration=15)
-        self.spectrogram_processor = SpectrogramProcessor(fft_size, hop_length)
-        self.visualizer = AudioVisualizer()
+        self.spectrogram_processor = SpectrogramProcessor(fft_size, hop_length, use_gpu=use_gpu)
+        self._visualizer = None
+        self._audio_recorder = None
         self.fingerprint_generator = FingerprintGenerator(fan_value, target_zone)
         self.db_manager = DatabaseManager(db_path)
+        self.fingerprint_cache = FingerprintCache(cache_dir) if cache_dir else None
+        
+        # Cached fingerprint total, read from the database once and kept current by store_song()
+        self._fingerprint_count = None
+        # In-memory copy of the Fingerprints table, loaded on first identification
+        self._fingerprint_index = None
+        # Report folder uploads as JSON lines on stderr instead of formatted text
+        self.quiet = False
     
-    def process_audio_file(self, file_path: str, sample_rate: int = 22050) -> Dict[str, Any]:
+    @property
+    def visualizer(self):
+        """
+        Audio visualizer, created on first use.
+        
+        Plotting pulls in matplotlib, which dominates Engine start-up time,
+        so it is only imported once a visualization is actually requested.
+        """
+        if self._visualizer is None:
+            from ..audio.audio_visualizer import AudioVisualizer
+            self._visualizer = AudioVisualizer()
+        return self._visualizer
+    
+    @property
+    def audio_recorder(self):
+        """
+        Microphone recorder, created on first use.
+        
+        Recording needs PyAudio and PortAudio, which uploads and file
+        identification never touch, so they are only imported here.
+        """
+        if self._audio_recorder is None:
+            from ..audio.audio_recorder import AudioRecorder
+            self._audio_recorder = AudioRecorder(config.RECORDED_AUDIO_PATH, duration=15)
+        return self._audio_recorder
+    
+    def process_audio_file(self, file_path: str, sample_rate: int = 22050,
+                           max_duration: Optional[float] = None) -> Dict[str, Any]:
         """
         Process an audio file and return comprehensive analysis results.
         
@@ -73,6 +166,8 @@ class Engine:
         Args:
             file_path: Path to the audio file to process
             sample_rate: Target sample rate for processing (default: 22050 Hz)
+            max_duration: Only decode and analyze this many seconds from the
+                         start of the file (default: whole file)
             
         Returns:
             Dictionary containing comprehensive analysis results with keys:
@@ -81,11 +176,79 @@ class Engine:
             - 'sample_rate': Actual sample rate used
             - 'duration': Audio duration in seconds
             - 'spectrogram': Computed spectrogram matrix
-            - 'peaks': Detected constellation peaks
-            - 'fingerprints': Generated audio fingerprints
+            - 'peaks': Detected constellation peaks as an (N, 2) int32 array
+            - 'fingerprints': Generated audio fingerprints as a FINGERPRINT_DTYPE array
         """
         # Load and normalize audio signal
-        signal, actual_sample_rate = self.audio_loader.load_audio_ffmpeg(file_path, sample_rate)
+        signal, actual_sample_rate = self.audio_loader.load_audio_ffmpeg(file_path, sample_rate,
+                                                                          max_duration=max_duration)
+        
+        return self.process_audio_signal(signal, actual_sample_rate, file_path)
+    
+    def _fingerprint_file(self, file_path: str, sample_rate: int = 22050,
+                          max_duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Fingerprint an audio file, reusing the fingerprint cache when enabled.
+        
+        On a cache hit only 'file_path', 'sample_rate', 'duration' and
+        'fingerprints' are filled in; the signal, spectrogram and peaks are
+        None. Callers that need those use process_audio_file() directly.
+        
+        Args:
+            file_path: Path to the audio file to process
+            sample_rate: Target sample rate for processing (default: 22050 Hz)
+            max_duration: Only analyze this many seconds from the start of the file
+            
+        Returns:
+            Dictionary with the same keys as process_audio_file()
+        """
+        cache = self.fingerprint_cache
+        key = None
+        if cache is not None:
+            processor = self.spectrogram_processor
+            key = cache.key(file_path, sample_rate, max_duration, processor.fft_size,
+                            processor.hop_length, processor.decibel_floor,
+                            self.fingerprint_generator.fan_value,
+                            self.fingerprint_generator.target_zone)
+            cached = cache.load(key) if key is not None else None
+            if cached is not None:
+                duration, actual_sample_rate, fingerprints = cached
+                return {
+                    'file_path': file_path,
+                    'signal': None,
+                    'sample_rate': actual_sample_rate,
+                    'duration': duration,
+                    'spectrogram': None,
+                    'freqs': None,
+                    'times': None,
+                    'peaks': None,
+                    'fingerprints': fingerprints
+                }
+        
+        analysis_results = self.process_audio_file(file_path, sample_rate, max_duration)
+        if key is not None:
+            try:
+                cache.store(key, analysis_results['duration'], analysis_results['sample_rate'],
+                            analysis_results['fingerprints'])
+            except OSError as e:
+                # A cache that cannot be written only costs the next analysis
+                logger.warning("Could not cache fingerprints for %s: %s", file_path, e)
+        return analysis_results
+    
+    def process_audio_signal(self, signal: np.ndarray, sample_rate: int, 
+                             file_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze an in-memory audio signal.
+        
+        Args:
+            signal: Normalized mono audio signal array
+            sample_rate: Sample rate of the signal in Hz
+            file_path: Source file path, if any, recorded in the results
+            
+        Returns:
+            Dictionary with the same keys as process_audio_file()
+        """
+        actual_sample_rate = sample_rate
         
         # Compute spectrogram for frequency analysis
         S_db, freqs, times = self.spectrogram_processor.compute_spectrogram(signal, actual_sample_rate)
@@ -94,7 +257,7 @@ class Engine:
         peaks = self.spectrogram_processor.find_peaks(S_db)
         
         # Generate fingerprints
-        fingerprints = self.fingerprint_generator.generate_fingerprints(peaks)
+        fingerprints = self.fingerprint_generator.generate_fingerprints(peaks, sorted_by_time=True)
         
         return {
             'file_path': file_path,
@@ -112,22 +275,36 @@ class Engine:
         """
         Record audio from the microphone and process it for identification.
         
-        This method captures real-time audio from the default microphone device,
-        saves it to a file, and then processes it for fingerprint generation.
+        This method captures real-time audio from the default microphone device
+        and processes the samples in memory, without a WAV write and re-decode.
         
         Returns:
-            Dictionary containing comprehensive analysis results from the recorded audio,
-            including the file path where the recording was saved.
+            Dictionary containing comprehensive analysis results from the recorded audio.
+            'file_path' is None since the recording is never written to disk.
         """
-        print("Recording audio from microphone...")
-        recorded_file_path = self.audio_recorder.record()
-        print(f"Recorded audio saved to: {recorded_file_path}")
+        logger.info("Recording audio from microphone")
+        signal = self.audio_recorder.record_samples()
         
-        # Process the recorded audio file
-        analysis_results = self.process_audio_file(recorded_file_path)
-        analysis_results['file_path'] = recorded_file_path  # Ensure file path is included
+        # Process the recorded samples directly
+        return self.process_audio_signal(signal, self.audio_recorder.sample_rate)
+    
+    def prewarm_audio(self) -> None:
+        """
+        Start initializing the microphone backend in the background.
         
-        return analysis_results
+        Intended to be called before blocking on user input so that a
+        subsequent process_audio_recording() does not pay the device set-up cost.
+        """
+        self.audio_recorder.prewarm()
+    
+    def arm_recording(self) -> None:
+        """
+        Open the microphone stream in the background ahead of a recording.
+        
+        Intended to be called right before a countdown so that the following
+        process_audio_recording() starts capturing immediately.
+        """
+        self.audio_recorder.arm()
     
     def add_song_to_database(self, file_path: str, title: str, artist: str = None) -> int:
         """
@@ -147,28 +324,209 @@ class Engine:
         Raises:
             Exception: If audio processing or database operations fail
         """
-        print(f"Processing and adding song: {title}")
+        song_id, _ = self.ingest_song(file_path, title, artist)
+        return song_id
+    
+    def ingest_song(self, file_path: str, title: str, artist: str = None) -> Tuple[int, int]:
+        """
+        Add a song to the database and report how many fingerprints were stored.
         
-        # Perform comprehensive audio analysis
-        analysis_results = self.process_audio_file(file_path)
+        Bulk uploads use the returned count to keep running totals without
+        re-querying the Fingerprints table afterwards.
         
-        # Store song metadata in database
-        song_id = self.db_manager.add_song(
-            title=title,
-            artist=artist,
-            file_path=file_path,
-            duration=analysis_results['duration']
-        )
+        Args:
+            file_path: Path to the audio file to process
+            title: Human-readable song title
+            artist: Artist name (optional, defaults to None)
+            
+        Returns:
+            Tuple of (song_id, fingerprint_count)
+            
+        Raises:
+            Exception: If audio processing or database operations fail
+        """
+        logger.info("Processing and adding song: %s", title)
+        
+        # Perform comprehensive audio analysis (or reuse cached fingerprints)
+        analysis_results = self._fingerprint_file(file_path)
         
-        # Store generated fingerprints in database
+        # Store song metadata and fingerprints in database
+        song_id = self.store_song(file_path, title, artist, 
+                                  analysis_results['duration'], 
+                                  analysis_results['fingerprints'])
         fingerprint_count = len(analysis_results['fingerprints'])
-        self.db_manager.add_fingerprints(song_id, analysis_results['fingerprints'])
         
-        print(f"Added song '{title}' with ID {song_id}")
-        print(f"Generated {fingerprint_count:,} fingerprints")
+        logger.info("Added song '%s' with ID %d (%d fingerprints)",
+                    title, song_id, fingerprint_count)
+        
+        return song_id, fingerprint_count
+    
+    def add_songs_batch(self, songs: Iterable[Tuple[str, str, Optional[str]]],
+                        sample_rate: int = 22050, max_workers: Optional[int] = None
+                        ) -> List[Tuple[str, Optional[int], Optional[str]]]:
+        """
+        Process many audio files in parallel and add them to the database.
+        
+        Files are analyzed by extract_fingerprints_parallel() across worker
+        processes while this process writes the finished songs, in input
+        order, inside one bulk transaction. A file that fails is reported
+        and skipped without aborting the batch.
+        
+        Args:
+            songs: (file_path, title, artist) tuples; artist may be None
+            sample_rate: Target sample rate for processing (default: 22050 Hz)
+            max_workers: Number of worker processes (default: os.cpu_count())
+            
+        Returns:
+            List of (file_path, song_id, error_message) tuples in input order;
+            song_id is None and error_message set for files that failed
+        """
+        songs = list(songs)
+        results = []
+        
+        with self.bulk_transaction():
+            extraction_results = self.extract_fingerprints_parallel(
+                [file_path for file_path, _, _ in songs], sample_rate, max_workers)
+            
+            for (file_path, title, artist), (_, duration, fingerprints, error) in zip(songs, extraction_results):
+                if error is None:
+                    try:
+                        song_id = self.store_song(file_path, title, artist, duration, fingerprints)
+                    except Exception as e:
+                        song_id, error = None, str(e)
+                else:
+                    song_id = None
+                results.append((file_path, song_id, error))
+        
+        return results
+    
+    def store_song(self, file_path: str, title: str, artist: Optional[str], 
+                   duration: float, fingerprints: np.ndarray,
+                   content_hash: Optional[str] = None) -> int:
+        """
+        Store an already analyzed song and its fingerprints in the database.
         
+        Args:
+            file_path: Path to the source audio file
+            title: Human-readable song title
+            artist: Artist name (optional)
+            duration: Song duration in seconds
+            fingerprints: Fingerprints generated for the song (FINGERPRINT_DTYPE array)
+            content_hash: Hash of the source file, recorded so that identical
+                         files can be skipped by later uploads (optional)
+            
+        Returns:
+            Integer song_id of the newly added song in the database
+        """
+        # One connection and one commit for the song, its fingerprints and its
+        # file hash (inside an upload's bulk transaction this joins that instead)
+        with self.db_manager.bulk_transaction():
+            song_id = self.db_manager.add_song(
+                title=title,
+                artist=artist,
+                file_path=file_path,
+                duration=duration
+            )
+            self.db_manager.add_fingerprints(song_id, fingerprints)
+            if content_hash is not None:
+                self.db_manager.add_ingested_file(content_hash, song_id)
+        
+        if self._fingerprint_count is not None:
+            self._fingerprint_count += len(fingerprints)
+        self._fingerprint_index = None
         return song_id
     
+    @contextmanager
+    def bulk_transaction(self):
+        """
+        Group the database writes made inside the block into one transaction.
+        
+        Wraps DatabaseManager.bulk_transaction() and drops the cached
+        statistics if the transaction is rolled back, since the rolled-back
+        songs were already counted.
+        """
+        try:
+            with self.db_manager.bulk_transaction():
+                yield
+        except BaseException:
+            self.invalidate_stats()
+            raise
+    
+    def commit_bulk_transaction(self) -> None:
+        """
+        Commit the songs stored so far inside bulk_transaction().
+        
+        See DatabaseManager.commit_bulk_transaction().
+        """
+        self.db_manager.commit_bulk_transaction()
+    
+    def invalidate_stats(self) -> None:
+        """Force cached fingerprint counts and the match index to be rebuilt on next use."""
+        self._fingerprint_count = None
+        self._fingerprint_index = None
+    
+    def _get_fingerprint_index(self) -> Optional[FingerprintIndex]:
+        """
+        Return the in-memory fingerprint index, loading it if necessary.
+        
+        Returns:
+            FingerprintIndex, or None while the database still holds legacy
+            binary fingerprints that only the SQL matcher can decode
+        """
+        if self._fingerprint_index is None and self.db_manager.is_optimized():
+            self._fingerprint_index = FingerprintIndex.from_database_cached(
+                self.db_manager, self.db_manager.db_path + '.index.npz')
+        return self._fingerprint_index
+    
+    def extract_fingerprints_parallel(self, file_paths: Iterable[str], sample_rate: int = 22050,
+                                      max_workers: Optional[int] = None
+                                      ) -> Iterator[Tuple[str, Optional[float], Optional[np.ndarray], Optional[str]]]:
+        """
+        Fingerprint many audio files across a pool of worker processes.
+        
+        Decoding and spectral analysis are CPU-bound and independent per file,
+        so they run in parallel while the caller consumes results in input
+        order and performs the database writes from a single process. Only a
+        couple of files per worker are kept in flight so that finished results
+        do not accumulate in memory while the caller is busy writing.
+        
+        Args:
+            file_paths: Audio files to process
+            sample_rate: Target sample rate for processing (default: 22050 Hz)
+            max_workers: Number of worker processes (default: os.cpu_count())
+            
+        Yields:
+            Tuples of (file_path, duration, fingerprints, error_message). On failure
+            duration and fingerprints are None and error_message describes the error.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        max_in_flight = max_workers * 2
+        path_iterator = iter(file_paths)
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_extraction_worker,
+            initargs=(self.audio_loader, self.spectrogram_processor, self.fingerprint_generator)
+        ) as executor:
+            pending = deque()
+            
+            for file_path in path_iterator:
+                pending.append((file_path, executor.submit(_extract_fingerprints_worker, 
+                                                           file_path, sample_rate)))
+                if len(pending) >= max_in_flight:
+                    break
+            
+            while pending:
+                file_path, future = pending.popleft()
+                
+                # Top up the queue before blocking on the oldest result
+                next_path = next(path_iterator, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(_extract_fingerprints_worker, 
+                                                               next_path, sample_rate)))
+                
+                yield (file_path,) + future.result()
+    
     def identify_song(self, file_path: str, max_duration: float = 30.0) -> Dict[str, Any]:
         """
         Identify a song from an audio file using database matching.
@@ -189,11 +547,29 @@ class Engine:
             - 'scores': Dictionary of match scores for all candidates
             - Additional match details if a match is found
         """
-        print(f"Identifying song from: {file_path}")
+        logger.info("Identifying song from: %s", file_path)
+        
+        # Decode only the part of the query that will be matched, so the
+        # analysis is not repeated on a truncated signal
+        analysis_results = self._fingerprint_file(file_path, max_duration=max_duration or None)
         
-        # Process the query audio file
-        analysis_results = self.process_audio_file(file_path)
+        return self.identify_analysis(analysis_results, max_duration=None)
+    
+    def identify_analysis(self, analysis_results: Dict[str, Any], 
+                          max_duration: float = 30.0) -> Dict[str, Any]:
+        """
+        Identify a song from audio that has already been analyzed.
         
+        Lets callers that already hold analysis results, such as a fresh
+        microphone recording, match them without decoding the audio again.
+        
+        Args:
+            analysis_results: Results from process_audio_file() or process_audio_signal()
+            max_duration: Maximum duration to process in seconds (default: 30.0)
+            
+        Returns:
+            Dictionary with the same keys as identify_song()
+        """
         # Apply duration limit if specified
         if max_duration and analysis_results['duration'] > max_duration:
             max_samples = int(max_duration * analysis_results['sample_rate'])
@@ -202,18 +578,25 @@ class Engine:
             S_db, freqs, times = self.spectrogram_processor.compute_spectrogram(
                 limited_signal, analysis_results['sample_rate'])
             peaks = self.spectrogram_processor.find_peaks(S_db)
-            fingerprints = self.fingerprint_generator.generate_fingerprints(peaks)
+            fingerprints = self.fingerprint_generator.generate_fingerprints(peaks, sorted_by_time=True)
             processed_duration = max_duration
         else:
             fingerprints = analysis_results['fingerprints']
             processed_duration = analysis_results['duration']
         
-        # Perform database matching
-        best_song_id, match_scores = self.db_manager.match_query(fingerprints)
+        # Perform matching against the in-memory index when available
+        fingerprint_index = self._get_fingerprint_index()
+        if fingerprint_index is not None:
+            best_song_id, match_scores = fingerprint_index.match(fingerprints)
+        else:
+            # One SQLite lookup per hash: feed them in time order and stop at a clear winner
+            chunk = self.MATCH_CHUNK_SIZE
+            best_song_id, match_scores = self.db_manager.match_query_stream(
+                fingerprints[start:start + chunk] for start in range(0, len(fingerprints), chunk))
         
         # Compile identification results
         identification_result = {
-            'query_file': file_path,
+            'query_file': analysis_results['file_path'],
             'query_duration': processed_duration,
             'query_fingerprints': len(fingerprints),
             'best_match_id': best_song_id,
@@ -289,14 +672,12 @@ class Engine:
         # Get list of all songs with metadata
         songs_list = self.db_manager.list_songs()
         
-        # Get total fingerprint count from database
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Fingerprints")
-            total_fingerprint_count = cursor.fetchone()[0]
+        # Read the stored total only once; store_song() keeps it current afterwards
+        if self._fingerprint_count is None:
+            self._fingerprint_count = self.db_manager.get_fingerprint_count()
         
         return {
             'total_songs': len(songs_list),
-            'total_fingerprints': total_fingerprint_count,
+            'total_fingerprints': self._fingerprint_count,
             'songs': songs_list
         }
@@ -0,0 +1,102 @@
+"""
+On-disk cache of per-file fingerprinting results.
+
+Decoding, the spectrogram and peak detection dominate the cost of
+analyzing a file, so repeated analyses of an unchanged file (database
+rebuilds, repeated identification runs) can load the fingerprints from
+a small .npz file instead.
+
+Author: Hocus Pocus Project
+Version: 1.0
+"""
+
+import hashlib
+import os
+import tempfile
+import numpy as np
+from typing import Any, Optional, Tuple
+from .fingerprint_generator import FINGERPRINT_DTYPE
+
+
+class FingerprintCache:
+    """
+    Directory of cached fingerprint arrays keyed by file identity and settings.
+
+    An entry is keyed by the file's absolute path, size and modification
+    time together with every parameter that affects the fingerprints, so
+    editing the file or changing the analysis settings simply misses.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            cache_dir: Directory holding the cache files
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, file_path: str, *settings: Any) -> Optional[str]:
+        """
+        Build the cache key for a file analyzed with the given settings.
+
+        Args:
+            file_path: Path to the audio file
+            *settings: Analysis parameters (must have a stable repr())
+
+        Returns:
+            Hex digest naming the cache entry, or None if the file cannot be stat'ed
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        identity = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns) + settings
+        return hashlib.blake2b(repr(identity).encode(), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.npz')
+
+    def load(self, key: str) -> Optional[Tuple[float, int, np.ndarray]]:
+        """
+        Read a cache entry.
+
+        Args:
+            key: Key from key()
+
+        Returns:
+            Tuple of (duration, sample_rate, fingerprints), or None on a miss
+            or an unreadable entry
+        """
+        try:
+            with np.load(self._path(key)) as entry:
+                fingerprints = entry['fingerprints']
+                if fingerprints.dtype != FINGERPRINT_DTYPE:
+                    return None
+                return float(entry['duration']), int(entry['sample_rate']), fingerprints
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def store(self, key: str, duration: float, sample_rate: int, fingerprints: np.ndarray) -> None:
+        """
+        Write a cache entry.
+
+        The file is written under a temporary name and renamed into place,
+        so concurrent readers never see a partial entry.
+
+        Args:
+            key: Key from key()
+            duration: Analyzed duration in seconds
+            sample_rate: Sample rate the file was decoded at
+            fingerprints: FINGERPRINT_DTYPE array to cache
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                np.savez(temp_file, duration=duration, sample_rate=sample_rate,
+                         fingerprints=fingerprints)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
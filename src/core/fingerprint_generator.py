@@ -9,7 +9,157 @@ Author: Hocus Pocus Project
 Version: 1.0
 """
 
-from typing import List, Tuple, Set
+import numpy as np
+from typing import List, Tuple, Union
+
+try:
+    import numba  # Optional: compiled pairing kernel (hocus-pocus[performance])
+except ImportError:
+    numba = None
+
+
+# One record per fingerprint: the (f_anchor, f_target, delta_t) hash and the
+# anchor time, 10 bytes each. 16-bit fields cover frequency bins for FFT
+# sizes up to 131072 and any practical target zone.
+FINGERPRINT_DTYPE = np.dtype([('f_anchor', '<u2'), ('f_target', '<u2'),
+                              ('delta_t', '<u2'), ('t_anchor', '<u4')])
+
+
+def as_fingerprint_array(fingerprints: Union[np.ndarray, List[Tuple[Tuple[int, int, int], int]]]) -> np.ndarray:
+    """
+    Convert fingerprints to a FINGERPRINT_DTYPE structured array.
+    
+    Args:
+        fingerprints: Structured array from generate_fingerprints(), or a list
+                     of ((f_anchor, f_target, delta_t), t_anchor) tuples
+        
+    Returns:
+        FINGERPRINT_DTYPE array (the input itself if it already is one)
+    """
+    if isinstance(fingerprints, np.ndarray) and fingerprints.dtype == FINGERPRINT_DTYPE:
+        return fingerprints
+    return np.array([(f_anchor, f_target, delta_t, t_anchor)
+                     for (f_anchor, f_target, delta_t), t_anchor in fingerprints],
+                    dtype=FINGERPRINT_DTYPE)
+
+
+def pack_hashes(f_anchor: np.ndarray, f_target: np.ndarray, delta_t: np.ndarray) -> np.ndarray:
+    """
+    Pack (f_anchor, f_target, delta_t) hash triples into single int64 keys.
+    
+    Each component gets 16 bits, which covers frequency bins for FFT sizes
+    up to 131072 and any practical target zone.
+    
+    Args:
+        f_anchor: Anchor peak frequency indices
+        f_target: Target peak frequency indices
+        delta_t: Time differences between anchor and target peaks
+        
+    Returns:
+        Array of packed int64 keys
+    """
+    return ((np.asarray(f_anchor, dtype=np.int64) << 32) |
+            (np.asarray(f_target, dtype=np.int64) << 16) |
+            np.asarray(delta_t, dtype=np.int64))
+
+
+def unpack_hashes(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split packed keys from pack_hashes() back into their components.
+    
+    Args:
+        hashes: Packed int64 keys
+        
+    Returns:
+        Tuple of (f_anchor, f_target, delta_t) int64 arrays
+    """
+    hashes = np.asarray(hashes, dtype=np.int64)
+    return hashes >> 32, (hashes >> 16) & 0xFFFF, hashes & 0xFFFF
+
+
+def _pair_indices_kernel(times: np.ndarray, fan_value: int, min_delta: int,
+                         max_delta: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Anchor and target indices of every pair inside the target zone.
+    
+    A counting pass sizes the outputs and a second pass fills them, so the
+    compiled version never grows a list or materializes a pair mask.
+    
+    Args:
+        times: Peak time indices in ascending order
+        fan_value: Number of following peaks considered per anchor
+        min_delta: Smallest accepted time difference
+        max_delta: Largest accepted time difference
+        
+    Returns:
+        Tuple of (anchor_idx, target_idx) int64 arrays in anchor order, then target order
+    """
+    num_peaks = len(times)
+    num_pairs = 0
+    for anchor in range(num_peaks):
+        for target in range(anchor + 1, min(anchor + fan_value + 1, num_peaks)):
+            delta_t = times[target] - times[anchor]
+            if min_delta <= delta_t <= max_delta:
+                num_pairs += 1
+    
+    anchor_idx = np.empty(num_pairs, dtype=np.int64)
+    target_idx = np.empty(num_pairs, dtype=np.int64)
+    pair = 0
+    for anchor in range(num_peaks):
+        for target in range(anchor + 1, min(anchor + fan_value + 1, num_peaks)):
+            delta_t = times[target] - times[anchor]
+            if min_delta <= delta_t <= max_delta:
+                anchor_idx[pair] = anchor
+                target_idx[pair] = target
+                pair += 1
+    return anchor_idx, target_idx
+
+
+def _load_cython_pair_indices():
+    """
+    Build and import the Cython pairing kernel (_pairing.pyx) via pyximport.
+    
+    The extension is compiled once into pyximport's build cache. Returns
+    None when Cython or a C compiler is not available.
+    """
+    try:
+        import pyximport
+    except ImportError:
+        return None
+    
+    importers = pyximport.install(language_level=3)
+    try:
+        from . import _pairing
+    except Exception:
+        return None
+    finally:
+        pyximport.uninstall(*importers)
+    return _pairing.pair_indices
+
+
+# Compiled pairing kernel: Numba first, then Cython; the NumPy mask in
+# _pair_peaks is used when neither is available. Numba compiles on first
+# call; the Cython build is deferred to _get_compiled_pair_indices().
+if numba is not None:
+    _compiled_pair_indices = numba.njit(cache=True, boundscheck=False)(_pair_indices_kernel)
+else:
+    _compiled_pair_indices = None
+_compiled_pair_indices_loaded = numba is not None
+
+
+def _get_compiled_pair_indices():
+    """
+    Return the compiled pairing kernel, loading the Cython build on first use.
+    
+    pyximport compiles _pairing.pyx on the first load (seconds), so it runs
+    only once a fingerprinting call is large enough to use the kernel rather
+    than when this module is imported.
+    """
+    global _compiled_pair_indices, _compiled_pair_indices_loaded
+    if not _compiled_pair_indices_loaded:
+        _compiled_pair_indices_loaded = True
+        _compiled_pair_indices = _load_cython_pair_indices()
+    return _compiled_pair_indices
 
 
 class FingerprintGenerator:
@@ -21,6 +171,9 @@ class FingerprintGenerator:
     peaks that are robust to noise and distortion.
     """
     
+    # Below this many peaks the NumPy path beats the compiled kernel's call overhead
+    COMPILED_MIN_PEAKS = 64
+    
     def __init__(self, fan_value: int = 5, target_zone: Tuple[int, int] = (1, 20)):
         """
         Initialize the fingerprint generator with configuration parameters.
@@ -34,7 +187,8 @@ class FingerprintGenerator:
         self.fan_value = fan_value
         self.target_zone = target_zone
     
-    def generate_fingerprints(self, peaks: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int, int], int]]:
+    def generate_fingerprints(self, peaks: Union[np.ndarray, List[Tuple[int, int]]],
+                              sorted_by_time: bool = False) -> np.ndarray:
         """
         Generate audio fingerprints from spectral peaks using constellation mapping.
         
@@ -42,40 +196,83 @@ class FingerprintGenerator:
         the fan-out range, creating unique hashes of (f_anchor, f_target, delta_t).
         
         Args:
-            peaks: List of detected spectral peaks as (time_index, freq_index) tuples.
-                  These should be the most prominent peaks from the spectrogram.
+            peaks: Detected spectral peaks as an (N, 2) array or list of
+                  (time_index, freq_index) pairs. These should be the most
+                  prominent peaks from the spectrogram.
+            sorted_by_time: Whether the peaks are already in stable time order,
+                           as returned by SpectrogramProcessor.find_peaks()
             
         Returns:
-            List of fingerprints as ((f_anchor, f_target, delta_t), t_anchor) tuples,
-            where each tuple represents a unique audio signature.
+            FINGERPRINT_DTYPE structured array with one (f_anchor, f_target,
+            delta_t, t_anchor) record per fingerprint, where each record
+            represents a unique audio signature.
             
         Note:
-            The peaks are automatically sorted by time to ensure consistent
-            fingerprint generation regardless of input order.
+            Unless sorted_by_time is set, the peaks are sorted by time to ensure
+            consistent fingerprint generation regardless of input order.
         """
-        if not peaks:
-            return []
+        if len(peaks) == 0:
+            return np.empty(0, dtype=FINGERPRINT_DTYPE)
             
-        # Sort peaks chronologically to ensure positive time deltas
-        sorted_peaks = sorted(peaks, key=lambda peak: peak[0])
-        fingerprints = []
-
-        for i, (t_anchor, f_anchor) in enumerate(sorted_peaks):
-            # Create fingerprints by pairing with subsequent peaks
-            for j in range(1, min(self.fan_value + 1, len(sorted_peaks) - i)):
-                target_idx = i + j
-                t_target, f_target = sorted_peaks[target_idx]
-                delta_t = t_target - t_anchor
-
+        # Sort peaks chronologically (stable, like sorted()) to ensure positive time deltas;
+        # int32 matches find_peaks() output, so no widened copy is made
+        peak_array = np.asarray(peaks, dtype=np.int32).reshape(-1, 2)
+        if not sorted_by_time:
+            peak_array = peak_array[np.argsort(peak_array[:, 0], kind='stable')]
+        
+        return self._pair_peaks(peak_array[:, 0], peak_array[:, 1], self.fan_value, self.target_zone)
+    
+    @staticmethod
+    def _pair_peaks(times: np.ndarray, freqs: np.ndarray, fan_value: int,
+                    target_zone: Tuple[int, int]) -> np.ndarray:
+        """
+        Pair each time-sorted peak with its next fan_value peaks inside the target zone.
+        
+        Args:
+            times: Peak time indices in ascending order
+            freqs: Peak frequency indices, aligned with times
+            fan_value: Number of following peaks considered per anchor
+            target_zone: Inclusive (min_delta_t, max_delta_t) range
+            
+        Returns:
+            FINGERPRINT_DTYPE array in anchor order, then target order
+        """
+        num_peaks = len(times)
+        min_delta, max_delta = target_zone
+        
+        compiled_pair_indices = None
+        if num_peaks >= FingerprintGenerator.COMPILED_MIN_PEAKS:
+            compiled_pair_indices = _get_compiled_pair_indices()
+        
+        if compiled_pair_indices is not None:
+            anchor_idx, target_idx = compiled_pair_indices(times, fan_value, min_delta, max_delta)
+        else:
+            # Pair every anchor with each of its next fan_value peaks: column j-1 of
+            # the mask marks the pairs (anchor i, target i + j), filled from one
+            # slice difference per offset instead of a gathered target grid
+            valid = np.zeros((num_peaks, fan_value), dtype=bool)
+            for offset in range(1, min(fan_value, num_peaks - 1) + 1):
+                delta_t = times[offset:] - times[:-offset]
                 # Filter pairs based on time difference constraints
-                if self.target_zone[0] <= delta_t <= self.target_zone[1]:
-                    fingerprint_hash = (f_anchor, f_target, delta_t)
-                    fingerprints.append((fingerprint_hash, t_anchor))
-
+                in_zone = valid[:num_peaks - offset, offset - 1]
+                np.greater_equal(delta_t, min_delta, out=in_zone)
+                in_zone &= delta_t <= max_delta
+            
+            # Row-major order matches the anchor/target loop order
+            anchor_idx, offset_idx = np.nonzero(valid)
+            target_idx = anchor_idx + offset_idx + 1
+        
+        # Fill the columns of one compact record array
+        fingerprints = np.empty(len(anchor_idx), dtype=FINGERPRINT_DTYPE)
+        fingerprints['f_anchor'] = freqs[anchor_idx]
+        fingerprints['f_target'] = freqs[target_idx]
+        fingerprints['delta_t'] = times[target_idx] - times[anchor_idx]
+        fingerprints['t_anchor'] = times[anchor_idx]
         return fingerprints
     
-    def generate_robust_fingerprints(self, peaks: List[Tuple[int, int]], 
-                                   multiple_strategies: bool = True) -> List[Tuple[Tuple[int, int, int], int]]:
+    def generate_robust_fingerprints(self, peaks: Union[np.ndarray, List[Tuple[int, int]]], 
+                                   multiple_strategies: bool = True,
+                                   sorted_by_time: bool = False) -> np.ndarray:
         """
         Generate enhanced fingerprints using multiple strategies for better robustness.
         
@@ -84,13 +281,15 @@ class FingerprintGenerator:
         noise, and temporal variations.
         
         Args:
-            peaks: List of detected spectral peaks as (time_index, freq_index) tuples.
+            peaks: Detected spectral peaks as an (N, 2) array or list of
+                  (time_index, freq_index) pairs.
             multiple_strategies: Whether to use multiple fan-out strategies for
                                enhanced robustness. Set to False for standard generation.
+            sorted_by_time: Whether the peaks are already in stable time order
             
         Returns:
-            List of unique fingerprints with duplicates removed while preserving
-            the temporal order of generation.
+            FINGERPRINT_DTYPE array of unique fingerprints with duplicates
+            removed while preserving the temporal order of generation.
             
         Note:
             The robust generation creates approximately 1.5-2x more fingerprints
@@ -98,55 +297,41 @@ class FingerprintGenerator:
             increased computational overhead.
         """
         if not multiple_strategies:
-            return self.generate_fingerprints(peaks)
+            return self.generate_fingerprints(peaks, sorted_by_time)
         
-        if not peaks:
-            return []
+        if len(peaks) == 0:
+            return np.empty(0, dtype=FINGERPRINT_DTYPE)
         
-        fingerprints = []
-        sorted_peaks = sorted(peaks, key=lambda peak: peak[0])
+        peak_array = np.asarray(peaks, dtype=np.int32).reshape(-1, 2)
+        if not sorted_by_time:
+            peak_array = peak_array[np.argsort(peak_array[:, 0], kind='stable')]
+        times, freqs = peak_array[:, 0], peak_array[:, 1]
         
         # Strategy 1: Standard constellation mapping
-        fingerprints.extend(self.generate_fingerprints(peaks))
+        standard = self._pair_peaks(times, freqs, self.fan_value, self.target_zone)
         
-        # Strategy 2: Reduced fan-out for closer temporal relationships
-        original_fan_value = self.fan_value
+        # Strategy 2: Reduced fan-out for closer temporal relationships, with an
+        # extended target zone for additional diversity
         reduced_fan_value = max(2, self.fan_value // 2)
-        
-        for i, (t_anchor, f_anchor) in enumerate(sorted_peaks):
-            for j in range(1, min(reduced_fan_value + 1, len(sorted_peaks) - i)):
-                target_idx = i + j
-                t_target, f_target = sorted_peaks[target_idx]
-                delta_t = t_target - t_anchor
-                
-                # Extended target zone for additional diversity
-                extended_max_delta = self.target_zone[1] + 5
-                if self.target_zone[0] <= delta_t <= extended_max_delta:
-                    fingerprint_hash = (f_anchor, f_target, delta_t)
-                    fingerprints.append((fingerprint_hash, t_anchor))
-        
-        # Restore original configuration
-        self.fan_value = original_fan_value
+        extended_zone = (self.target_zone[0], self.target_zone[1] + 5)
+        reduced = self._pair_peaks(times, freqs, reduced_fan_value, extended_zone)
         
         # Remove duplicates while preserving temporal order
-        return self._remove_duplicates(fingerprints)
+        return self._remove_duplicates(np.concatenate((standard, reduced)))
     
-    def _remove_duplicates(self, fingerprints: List[Tuple[Tuple[int, int, int], int]]) -> List[Tuple[Tuple[int, int, int], int]]:
+    def _remove_duplicates(self, fingerprints: np.ndarray) -> np.ndarray:
         """
         Remove duplicate fingerprints while preserving temporal order.
         
         Args:
-            fingerprints: List of fingerprints that may contain duplicates.
+            fingerprints: FINGERPRINT_DTYPE array that may contain duplicates.
             
         Returns:
-            List of unique fingerprints in their original temporal order.
+            FINGERPRINT_DTYPE array of the first occurrence of each hash, in
+            the original order.
         """
-        seen_hashes: Set[Tuple[int, int, int]] = set()
-        unique_fingerprints = []
-        
-        for fingerprint_hash, t_anchor in fingerprints:
-            if fingerprint_hash not in seen_hashes:
-                seen_hashes.add(fingerprint_hash)
-                unique_fingerprints.append((fingerprint_hash, t_anchor))
-        
-        return unique_fingerprints
+        hashes = pack_hashes(fingerprints['f_anchor'], fingerprints['f_target'], fingerprints['delta_t'])
+        # np.unique reports the first occurrence of each key; sorting those
+        # indices restores the original order
+        _, first_occurrences = np.unique(hashes, return_index=True)
+        return fingerprints[np.sort(first_occurrences)]
@@ -9,10 +9,107 @@ Author: Hocus Pocus Project
 Version: 1.0
 """
 
+import heapq
+import itertools
+import logging
 import sqlite3
 import struct
 from collections import defaultdict
-from typing import List, Tuple, Optional, Dict, DefaultDict
+from contextlib import contextmanager
+from typing import List, Tuple, Optional, Dict, DefaultDict, Iterable, Set, Union
+import numpy as np
+from ..core.fingerprint_generator import as_fingerprint_array
+
+
+# Progress and data warnings go through logging, like the engine's messages
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Fingerprints table columns, shared by schema creation and the rebuild in
+# optimize_database()
+FINGERPRINTS_COLUMNS_SQL = '''(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    song_id INTEGER NOT NULL,
+    f_anchor INTEGER NOT NULL,
+    f_target INTEGER NOT NULL,
+    delta_t INTEGER NOT NULL,
+    t_anchor INTEGER NOT NULL,
+    FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+)'''
+
+# Index for song-based queries
+SONG_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_song_fingerprints 
+    ON Fingerprints (song_id)
+'''
+
+# Covering index for hash lookups: match_query() reads song_id and t_anchor
+# straight from the index without visiting the table rows
+LOOKUP_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_fingerprint_lookup 
+    ON Fingerprints (f_anchor, f_target, delta_t, song_id, t_anchor)
+'''
+
+# Rows converted to Python integers at a time when inserting fingerprints
+_INSERT_CHUNK_SIZE = 8192
+
+# Added to match offsets so that (song_id, offset) pairs pack into one
+# non-negative int64 sort key
+_OFFSET_BIAS = 1 << 31
+
+
+# SQLite binds NumPy integers as BLOBs, which never equal the stored INTEGER
+# columns and make lookups silently return nothing. Bind them as integers
+# instead; hot paths still convert whole columns with tolist(), which is
+# cheaper than an adapter call per value.
+for _numpy_int in (np.int8, np.int16, np.int32, np.int64,
+                   np.uint8, np.uint16, np.uint32, np.uint64):
+    sqlite3.register_adapter(_numpy_int, int)
+
+
+def _legacy_column_sql(column: str, all_blobs: bool) -> str:
+    """
+    SQL expression converting a fingerprint column with legacy_to_int().
+    
+    In a partly converted table only blobs are passed to the Python
+    function and integers are copied by SQLite; when every row holds blobs
+    the per-value type test would only add work, so it is left out.
+    """
+    if all_blobs:
+        return f"legacy_to_int({column})"
+    return f"CASE WHEN typeof({column}) = 'blob' THEN legacy_to_int({column}) ELSE {column} END"
+
+
+def _tune_connection(conn: sqlite3.Connection) -> None:
+    """
+    Apply the cache settings shared by every connection.
+    
+    Index pages are served from a 64 MB page cache and a memory map of up
+    to 1 GB of the file instead of a read() per page, and temporary tables
+    (such as the query table used by match_query()) stay in memory.
+    """
+    conn.execute("PRAGMA mmap_size=1073741824")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+# Decoder for the little-endian int32 at the start of a legacy blob
+_unpack_legacy_int = struct.Struct('<i').unpack_from
+
+
+def _legacy_to_int(value) -> int:
+    """
+    Convert a fingerprint column value, possibly a legacy binary blob, to an integer.
+    
+    Registered as an SQLite function so that optimize_database() can convert
+    the whole table in one INSERT ... SELECT. It runs once per column value,
+    so the common blob case is decoded in place with a precompiled Struct.
+    """
+    if isinstance(value, bytes):
+        if len(value) >= 4:
+            return _unpack_legacy_int(value)[0]
+        return int.from_bytes(value, 'little')
+    return int(value)
 
 
 class DatabaseManager:
@@ -32,6 +129,10 @@ class DatabaseManager:
             db_path: Path to the SQLite database file. Will be created if it doesn't exist.
         """
         self.db_path = db_path
+        self._bulk_connection = None  # Set while inside bulk_transaction()
+        self._reader = None  # Shared connection for queries, see _read_connection()
+        self._writer = None  # Shared connection for writes, see _write_connection()
+        self._needs_optimization = None  # Cached needs_optimization() result
         self._initialize_database()
     
     def _initialize_database(self) -> None:
@@ -46,6 +147,10 @@ class DatabaseManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # WAL is stored in the database file, so every later connection
+            # uses it and readers never block on a writer
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Create Songs table for metadata storage
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS Songs (
@@ -59,29 +164,34 @@ class DatabaseManager:
             ''')
             
             # Create Fingerprints table for audio signature storage
+            cursor.execute("CREATE TABLE IF NOT EXISTS Fingerprints " + FINGERPRINTS_COLUMNS_SQL)
+            
+            # Create optimized index for fingerprint matching performance
+            cursor.execute(LOOKUP_INDEX_SQL)
+            
+            # Create index for song-based queries
+            cursor.execute(SONG_INDEX_SQL)
+            
+            # Create table mapping file content hashes to songs for duplicate detection
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Fingerprints (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS IngestedFiles (
+                    content_hash TEXT PRIMARY KEY,
                     song_id INTEGER NOT NULL,
-                    f_anchor INTEGER NOT NULL,
-                    f_target INTEGER NOT NULL,
-                    delta_t INTEGER NOT NULL,
-                    t_anchor INTEGER NOT NULL,
                     FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
                 )
             ''')
             
-            # Create optimized index for fingerprint matching performance
+            # Create single-row table holding the fingerprint total, which SQLite
+            # could otherwise only produce with a full table scan
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_fingerprint_lookup 
-                ON Fingerprints (f_anchor, f_target, delta_t)
-            ''')
-            
-            # Create index for song-based queries
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_song_fingerprints 
-                ON Fingerprints (song_id)
+                CREATE TABLE IF NOT EXISTS Stats (
+                    total_fingerprints INTEGER NOT NULL
+                )
             ''')
+            cursor.execute("SELECT 1 FROM Stats")
+            if cursor.fetchone() is None:
+                # New table (or existing database): count once, then keep it current
+                cursor.execute("INSERT INTO Stats (total_fingerprints) SELECT COUNT(*) FROM Fingerprints")
             
             conn.commit()
     
@@ -89,13 +199,124 @@ class DatabaseManager:
         """
         Create and return a new database connection.
         
+        The database is in WAL mode (set once by _initialize_database), where
+        synchronous=NORMAL only syncs at checkpoints instead of on every
+        commit while keeping the database consistent after a crash.
+        
         Returns:
             SQLite connection object with row factory configured for easier data access.
         """
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _tune_connection(conn)
         return conn
     
+    def _read_connection(self) -> sqlite3.Connection:
+        """
+        Return the connection shared by all read queries.
+        
+        Opened on first use and kept for the lifetime of the manager, so
+        repeated lookups skip the file open and keep SQLite's page cache
+        warm. It runs in autocommit mode and therefore always sees the
+        latest committed writes.
+        """
+        if self._reader is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            _tune_connection(conn)
+            self._reader = conn
+        return self._reader
+    
+    def _writer_connection(self) -> sqlite3.Connection:
+        """
+        Return the connection shared by all writes, opening it on first use.
+        
+        Keeping it open spares every add_song()/add_fingerprints() call the
+        connect, schema load and PRAGMA set-up of a fresh connection.
+        """
+        if self._writer is None:
+            self._writer = self.get_connection()
+        return self._writer
+    
+    def close(self) -> None:
+        """Close the shared connections; they are reopened on next use."""
+        for conn in (self._reader, self._writer):
+            if conn is not None:
+                conn.close()
+        self._reader = None
+        self._writer = None
+    
+    def __enter__(self) -> 'DatabaseManager':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    @contextmanager
+    def _write_connection(self):
+        """
+        Yield the shared write connection.
+        
+        Inside bulk_transaction() nothing is committed; otherwise the
+        writes are committed on exit (or rolled back if the block raises).
+        """
+        conn = self._writer_connection()
+        if self._bulk_connection is not None:
+            yield conn
+            return
+        
+        with conn:
+            yield conn
+    
+    @contextmanager
+    def bulk_transaction(self):
+        """
+        Group every write made inside the block into a single transaction.
+        
+        Bulk uploads otherwise commit (and fsync) once per song and once per
+        fingerprint batch. The transaction is committed when the block exits
+        normally and rolled back if it raises. A nested block joins the
+        enclosing transaction under a savepoint: if it raises, only its own
+        writes are rolled back and committing is left to the outer block.
+        """
+        if self._bulk_connection is not None:
+            conn = self._bulk_connection
+            if not conn.in_transaction:
+                # Open the outer transaction explicitly; a SAVEPOINT outside one
+                # would start a transaction that its RELEASE commits
+                conn.execute("BEGIN")
+            conn.execute("SAVEPOINT nested_bulk")
+            try:
+                yield
+            except BaseException:
+                conn.execute("ROLLBACK TO nested_bulk")
+                conn.execute("RELEASE nested_bulk")
+                raise
+            conn.execute("RELEASE nested_bulk")
+            return
+        
+        conn = self._writer_connection()
+        self._bulk_connection = conn
+        try:
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._bulk_connection = None
+    
+    def commit_bulk_transaction(self) -> None:
+        """
+        Commit the writes made so far inside bulk_transaction() and keep it open.
+        
+        Long uploads call this periodically so that an interruption only
+        rolls back the writes since the last commit. Does nothing outside
+        bulk_transaction().
+        """
+        if self._bulk_connection is not None:
+            self._bulk_connection.commit()
+    
     def add_song(self, title: str, artist: str = None, file_path: str = None, 
                  duration: float = None) -> int:
         """
@@ -110,7 +331,7 @@ class DatabaseManager:
         Returns:
             The song_id of the inserted song
         """
-        with self.get_connection() as conn:
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO Songs (title, artist, file_path, duration)
@@ -118,32 +339,78 @@ class DatabaseManager:
             ''', (title, artist, file_path, duration))
             return cursor.lastrowid
     
-    def add_fingerprints(self, song_id: int, fingerprints: List[Tuple[Tuple[int, int, int], int]]):
+    def add_fingerprints(self, song_id: int,
+                         fingerprints: Union[np.ndarray, List[Tuple[Tuple[int, int, int], int]]]):
         """
         Add fingerprints for a song to the database.
         
         Args:
             song_id: ID of the song
-            fingerprints: List of ((f_anchor, f_target, delta_t), t_anchor) tuples
+            fingerprints: FINGERPRINT_DTYPE array from FingerprintGenerator, or a
+                         list of ((f_anchor, f_target, delta_t), t_anchor) tuples
         """
-        with self.get_connection() as conn:
+        fingerprints = as_fingerprint_array(fingerprints)
+        
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             
-            fingerprint_data = []
-            for (f_anchor, f_target, delta_t), t_anchor in fingerprints:
-                # Convert NumPy types to Python integers for SQLite compatibility
-                fingerprint_data.append((
-                    int(song_id), 
-                    int(f_anchor), 
-                    int(f_target), 
-                    int(delta_t), 
-                    int(t_anchor)
-                ))
-            
             cursor.executemany('''
                 INSERT INTO Fingerprints (song_id, f_anchor, f_target, delta_t, t_anchor)
                 VALUES (?, ?, ?, ?, ?)
-            ''', fingerprint_data)
+            ''', self._fingerprint_rows(int(song_id), fingerprints))
+            
+            # Keep the stored total current within the same transaction
+            cursor.execute("UPDATE Stats SET total_fingerprints = total_fingerprints + ?",
+                           (len(fingerprints),))
+    
+    @staticmethod
+    def _fingerprint_rows(song_id: int, fingerprints: np.ndarray) -> Iterable[Tuple[int, ...]]:
+        """
+        Yield Fingerprints rows for executemany() from a FINGERPRINT_DTYPE array.
+        
+        Columns are converted to Python integers with tolist() one chunk at a
+        time, so a long song never holds its whole table as Python objects.
+        """
+        for start in range(0, len(fingerprints), _INSERT_CHUNK_SIZE):
+            chunk = fingerprints[start:start + _INSERT_CHUNK_SIZE]
+            yield from zip(itertools.repeat(song_id),
+                           chunk['f_anchor'].tolist(),
+                           chunk['f_target'].tolist(),
+                           chunk['delta_t'].tolist(),
+                           chunk['t_anchor'].tolist())
+    
+    def get_fingerprint_count(self) -> int:
+        """
+        Get the number of fingerprints in the database.
+        
+        Reads the total maintained by add_fingerprints() instead of counting
+        the Fingerprints table.
+        
+        Returns:
+            Total number of stored fingerprints
+        """
+        cursor = self._read_connection().cursor()
+        cursor.execute("SELECT total_fingerprints FROM Stats")
+        return cursor.fetchone()[0]
+    
+    def get_fingerprint_version(self) -> Tuple[int, int, int]:
+        """
+        Get a cheap token that changes whenever the Fingerprints table changes.
+        
+        Fingerprints are only ever appended, or rewritten by a schema-changing
+        rebuild, so the stored total, the highest row id and SQLite's schema
+        version together identify the table contents.
+        
+        Returns:
+            Tuple of (total_fingerprints, max_fingerprint_id, schema_version)
+        """
+        cursor = self._read_connection().cursor()
+        cursor.execute("SELECT total_fingerprints FROM Stats")
+        total = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM Fingerprints")
+        max_id = cursor.fetchone()[0]
+        cursor.execute("PRAGMA schema_version")
+        return total, max_id, cursor.fetchone()[0]
     
     def get_song_info(self, song_id: int) -> Optional[Dict]:
         """
@@ -155,24 +422,87 @@ class DatabaseManager:
         Returns:
             Dictionary with song information or None if not found
         """
-        with self.get_connection() as conn:
+        cursor = self._read_connection().cursor()
+        cursor.execute('''
+            SELECT song_id, title, artist, file_path, duration, created_at
+            FROM Songs WHERE song_id = ?
+        ''', (song_id,))
+        
+        row = cursor.fetchone()
+        if row:
+            return {
+                'song_id': row[0],
+                'title': row[1],
+                'artist': row[2],
+                'file_path': row[3],
+                'duration': row[4],
+                'created_at': row[5]
+            }
+        return None
+    
+    def sample_fingerprints(self, song_id: int, limit: int = 5) -> List[Tuple]:
+        """
+        Get a few stored fingerprints of a song, for inspection.
+        
+        Args:
+            song_id: ID of the song
+            limit: Maximum number of fingerprints returned
+            
+        Returns:
+            List of (f_anchor, f_target, delta_t, t_anchor) rows as stored
+            (legacy databases may hold binary values)
+        """
+        cursor = self._read_connection().cursor()
+        cursor.execute('''
+            SELECT f_anchor, f_target, delta_t, t_anchor
+            FROM Fingerprints WHERE song_id = ? LIMIT ?
+        ''', (song_id, limit))
+        return cursor.fetchall()
+    
+    def top_songs_by_fingerprint_count(self, limit: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Get songs ordered by how many fingerprints they have.
+        
+        The per-song counts are read from idx_song_fingerprints alone.
+        
+        Args:
+            limit: Maximum number of songs returned (default: all songs with fingerprints)
+            
+        Returns:
+            List of (song_id, fingerprint_count) tuples, largest first
+        """
+        cursor = self._read_connection().cursor()
+        cursor.execute('''
+            SELECT song_id, COUNT(*) FROM Fingerprints
+            GROUP BY song_id ORDER BY COUNT(*) DESC LIMIT ?
+        ''', (-1 if limit is None else limit,))
+        return cursor.fetchall()
+    
+    def add_ingested_file(self, content_hash: str, song_id: int) -> None:
+        """
+        Record that a file with the given content hash was stored as a song.
+        
+        Args:
+            content_hash: Hex digest of the source file contents
+            song_id: ID of the song created from the file
+        """
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT song_id, title, artist, file_path, duration, created_at
-                FROM Songs WHERE song_id = ?
-            ''', (song_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'song_id': row[0],
-                    'title': row[1],
-                    'artist': row[2],
-                    'file_path': row[3],
-                    'duration': row[4],
-                    'created_at': row[5]
-                }
-            return None
+                INSERT OR REPLACE INTO IngestedFiles (content_hash, song_id)
+                VALUES (?, ?)
+            ''', (content_hash, song_id))
+    
+    def get_ingested_hashes(self) -> Set[str]:
+        """
+        Get the content hashes of all files already stored as songs.
+        
+        Returns:
+            Set of hex digests
+        """
+        cursor = self._read_connection().cursor()
+        cursor.execute("SELECT content_hash FROM IngestedFiles")
+        return {row[0] for row in cursor.fetchall()}
     
     def list_songs(self) -> List[Dict]:
         """
@@ -181,79 +511,177 @@ class DatabaseManager:
         Returns:
             List of dictionaries with song information
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT song_id, title, artist, file_path, duration, created_at
-                FROM Songs ORDER BY created_at DESC
-            ''')
-            
-            songs = []
-            for row in cursor.fetchall():
-                songs.append({
-                    'song_id': row[0],
-                    'title': row[1],
-                    'artist': row[2],
-                    'file_path': row[3],
-                    'duration': row[4],
-                    'created_at': row[5]
-                })
-            return songs
-    
-    def match_query(self, fingerprints_query: List[Tuple[Tuple[int, int, int], int]]) -> Tuple[Optional[int], Dict]:
+        cursor = self._read_connection().cursor()
+        cursor.execute('''
+            SELECT song_id, title, artist, file_path, duration, created_at
+            FROM Songs ORDER BY created_at DESC
+        ''')
+        
+        songs = []
+        for row in cursor.fetchall():
+            songs.append({
+                'song_id': row[0],
+                'title': row[1],
+                'artist': row[2],
+                'file_path': row[3],
+                'duration': row[4],
+                'created_at': row[5]
+            })
+        return songs
+    
+    def match_query(self, fingerprints_query: Union[np.ndarray, List[Tuple[Tuple[int, int, int], int]]]
+                    ) -> Tuple[Optional[int], Dict]:
         """
         Match query fingerprints against the database.
         
         Args:
-            fingerprints_query: List of ((f_anchor, f_target, delta_t), t_anchor_query) tuples
+            fingerprints_query: FINGERPRINT_DTYPE array, or a list of
+                               ((f_anchor, f_target, delta_t), t_anchor_query) tuples
             
         Returns:
             Tuple of (best_song_id, scores_dict)
         """
         scores = defaultdict(int)
+        self._score_fingerprints(self._read_connection().cursor(), fingerprints_query, scores)
+        return self._best_match(scores)
+    
+    def match_query_stream(self, fingerprint_chunks: Iterable[np.ndarray],
+                           min_votes: int = 40, margin: float = 4.0
+                           ) -> Tuple[Optional[int], Dict]:
+        """
+        Match query fingerprints chunk by chunk and stop at a clear winner.
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        Every query hash costs one SQLite lookup here, so on a clear match
+        most of them can be skipped: after each chunk the search ends once
+        the leading song has at least min_votes aligned matches and margin
+        times as many as any other song. The scores then only cover the
+        chunks consumed.
+        
+        Args:
+            fingerprint_chunks: FINGERPRINT_DTYPE arrays (or tuple lists) in anchor time order
+            min_votes: Aligned matches the leading song needs before stopping early
+            margin: Required ratio between the leading song and the runner-up
             
-            for (f_anchor, f_target, delta_t), t_anchor_query in fingerprints_query:
-                # Convert NumPy types to Python integers for SQLite compatibility
-                f_anchor = int(f_anchor)
-                f_target = int(f_target) 
-                delta_t = int(delta_t)
-                t_anchor_query = int(t_anchor_query)
-                
-                cursor.execute('''
-                    SELECT song_id, t_anchor 
-                    FROM Fingerprints
-                    WHERE f_anchor=? AND f_target=? AND delta_t=?
-                ''', (f_anchor, f_target, delta_t))
-
-                matches = cursor.fetchall()
-                for song_id, t_anchor_db in matches:
-                    # Ensure database values are also integers
-                    try:
-                        if isinstance(t_anchor_db, bytes):
-                            # Legacy handling for binary data (shouldn't occur after optimization)
-                            if len(t_anchor_db) >= 4:
-                                t_anchor_db = struct.unpack('<i', t_anchor_db[:4])[0]
-                            else:
-                                t_anchor_db = int.from_bytes(t_anchor_db, 'little')
+        Returns:
+            Tuple of (best_song_id, scores_dict), as from match_query()
+        """
+        scores = defaultdict(int)
+        song_best = defaultdict(int)  # Highest offset score per song
+        cursor = self._read_connection().cursor()
+        
+        for chunk in fingerprint_chunks:
+            self._score_fingerprints(cursor, chunk, scores, song_best)
+            
+            top = heapq.nlargest(2, song_best.values())
+            if top and top[0] >= min_votes and (len(top) == 1 or top[0] >= margin * top[1]):
+                break
+        
+        return self._best_match(scores)
+    
+    @staticmethod
+    def _score_fingerprints(cursor: sqlite3.Cursor,
+                            fingerprints_query: Union[np.ndarray, List[Tuple[Tuple[int, int, int], int]]],
+                            scores: DefaultDict[Tuple[int, int], int],
+                            song_best: Optional[DefaultDict[int, int]] = None) -> None:
+        """
+        Add the aligned matches of query fingerprints to a score histogram.
+        
+        Args:
+            cursor: Cursor to run the hash lookups on
+            fingerprints_query: Query fingerprints (see match_query())
+            scores: Histogram of (song_id, offset) match counts, updated in place
+            song_best: Optional highest score per song, updated in place
+        """
+        # tolist() yields Python integers, as SQLite requires
+        fingerprints_query = as_fingerprint_array(fingerprints_query).tolist()
+        
+        # Load the query into a temporary table and resolve every hash in one
+        # join instead of preparing and stepping one SELECT per fingerprint.
+        # CROSS JOIN keeps the query table as the outer loop, so each row
+        # probes idx_fingerprint_lookup and matches arrive in query order.
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS QueryFingerprints (
+                f_anchor INTEGER, f_target INTEGER, delta_t INTEGER, t_anchor INTEGER
+            )
+        ''')
+        # One explicit transaction: the read connection is in autocommit mode,
+        # which would otherwise commit after every inserted row
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("DELETE FROM temp.QueryFingerprints")
+            cursor.executemany("INSERT INTO temp.QueryFingerprints VALUES (?, ?, ?, ?)",
+                               fingerprints_query)
+        except BaseException:
+            # Never leave the shared connection inside a transaction, or every
+            # later match would fail at BEGIN
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+        cursor.execute('''
+            SELECT f.song_id, f.t_anchor, q.t_anchor
+            FROM temp.QueryFingerprints AS q
+            CROSS JOIN Fingerprints AS f
+            ON f.f_anchor = q.f_anchor AND f.f_target = q.f_target AND f.delta_t = q.delta_t
+            ORDER BY q.rowid
+        ''')
+        
+        rows = cursor.fetchall()
+        try:
+            matches = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        except (TypeError, ValueError):
+            matches = None  # Legacy binary values, decoded row by row below
+        
+        if matches is not None:
+            # Count every (song_id, offset) pair in one vectorized pass and
+            # merge only the distinct pairs into the histogram
+            offsets = matches[:, 1] - matches[:, 2]
+            keys, counts = np.unique((matches[:, 0] << 32) + (offsets + _OFFSET_BIAS),
+                                     return_counts=True)
+            song_ids = (keys >> 32).tolist()
+            offsets = ((keys & 0xFFFFFFFF) - _OFFSET_BIAS).tolist()
+            pairs = zip(zip(song_ids, offsets), counts.tolist())
+            if not scores and song_best is None:
+                # Nothing to merge into: dict.update inserts the distinct pairs in C
+                scores.update(pairs)
+            else:
+                for key, count in pairs:
+                    scores[key] += count
+                    if song_best is not None and scores[key] > song_best[key[0]]:
+                        song_best[key[0]] = scores[key]
+        else:
+            skipped = 0
+            for song_id, t_anchor_db, t_anchor_query in rows:
+                # Ensure database values are also integers
+                try:
+                    if isinstance(t_anchor_db, bytes):
+                        # Legacy handling for binary data (shouldn't occur after optimization)
+                        if len(t_anchor_db) >= 4:
+                            t_anchor_db = struct.unpack('<i', t_anchor_db[:4])[0]
                         else:
-                            t_anchor_db = int(t_anchor_db)
-                        
-                        # Calculate time offset for this match
-                        offset = t_anchor_db - t_anchor_query
-                        scores[(song_id, offset)] += 1
-                        
-                    except (ValueError, struct.error) as e:
-                        # Skip corrupted data
-                        print(f"Warning: Skipping corrupted fingerprint data: {e}")
-                        continue
-
+                            t_anchor_db = int.from_bytes(t_anchor_db, 'little')
+                    else:
+                        t_anchor_db = int(t_anchor_db)
+                    
+                    # Calculate time offset for this match
+                    key = (song_id, t_anchor_db - t_anchor_query)
+                    scores[key] += 1
+                    if song_best is not None and scores[key] > song_best[song_id]:
+                        song_best[song_id] = scores[key]
+                    
+                except (ValueError, struct.error):
+                    # Skip corrupted data, reported once below
+                    skipped += 1
+                    continue
+            
+            if skipped:
+                logger.warning("Skipped %d matches with corrupted fingerprint data", skipped)
+    
+    @staticmethod
+    def _best_match(scores: DefaultDict[Tuple[int, int], int]) -> Tuple[Optional[int], Dict]:
+        """Pick the song with the highest (song_id, offset) score."""
         if scores:
             # Find the best match by maximum score
-            best_match = max(scores.items(), key=lambda x: x[1])
-            best_song_id = best_match[0][0]
+            best_song_id = max(scores, key=scores.get)[0]
             return best_song_id, dict(scores)
         else:
             return None, dict(scores)
@@ -273,14 +701,15 @@ class DatabaseManager:
         if not song_info:
             return {}
         
-        # Find best offset and score for this song
-        song_scores = [(offset, score) for (sid, offset), score in scores.items() if sid == song_id]
-        if song_scores:
-            best_offset, best_score = max(song_scores, key=lambda x: x[1])
-            total_matches = sum(score for _, score in song_scores)
-        else:
-            best_offset, best_score, total_matches = 0, 0, 0
-        
+        # Find best offset, score and total for this song in one pass
+        best_offset, best_score, total_matches = 0, 0, 0
+        for (sid, offset), score in scores.items():
+            if sid != song_id:
+                continue
+            total_matches += score
+            if score > best_score:
+                best_offset, best_score = offset, score
+
         return {
             'song_info': song_info,
             'best_offset': best_offset,
@@ -289,36 +718,52 @@ class DatabaseManager:
             'confidence': best_score / len(scores) if scores else 0
         }
     
+    def _has_covering_lookup_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Check whether the hash lookup index also stores song_id and t_anchor.
+        
+        Databases created before the covering index was introduced still
+        have an index on the hash columns only.
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='index' AND name='idx_fingerprint_lookup'")
+        row = cursor.fetchone()
+        return row is not None and 't_anchor' in row[0]
+    
     def needs_optimization(self) -> bool:
         """
         Check if the database needs optimization.
         
         This method detects if the fingerprints table contains binary blob data
         that should be converted to proper integers for better performance and
-        smaller storage size.
+        smaller storage size, or if the lookup index is not yet covering.
+        
+        The result is cached: fingerprints written by this class are always
+        integers, so only optimize_database() can change the answer.
         
         Returns:
             True if optimization is needed, False otherwise.
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if we have any fingerprints
-            cursor.execute("SELECT COUNT(*) FROM Fingerprints LIMIT 1")
-            if cursor.fetchone()[0] == 0:
-                return False
-            
+        if self._needs_optimization is not None:
+            return self._needs_optimization
+        
+        cursor = self._read_connection().cursor()
+        
+        # Check if we have any fingerprints (not cached, the next upload may add some);
+        # reading one row avoids the full table scan COUNT(*) would need
+        cursor.execute("SELECT 1 FROM Fingerprints LIMIT 1")
+        if cursor.fetchone() is None:
+            return False
+        
+        self._needs_optimization = not self._has_covering_lookup_index(cursor)
+        if not self._needs_optimization:
             # Sample a few records to check data types
             cursor.execute("SELECT f_anchor, f_target, delta_t, t_anchor FROM Fingerprints LIMIT 10")
             rows = cursor.fetchall()
             
-            for row in rows:
-                # Check if any values are stored as binary blobs
-                for value in row:
-                    if isinstance(value, bytes):
-                        return True
-            
-            return False
+            # Check if any values are stored as binary blobs
+            self._needs_optimization = any(isinstance(value, bytes) for row in rows for value in row)
+        
+        return self._needs_optimization
     
     def is_optimized(self) -> bool:
         """
@@ -327,25 +772,24 @@ class DatabaseManager:
         Returns:
             True if database is optimized, False if it needs optimization.
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if we have any fingerprints
-            cursor.execute("SELECT COUNT(*) FROM Fingerprints LIMIT 1")
-            if cursor.fetchone()[0] == 0:
-                return True  # Empty database is considered optimized
-            
-            # Sample a few records to check data types
-            cursor.execute("SELECT f_anchor, f_target, delta_t, t_anchor FROM Fingerprints LIMIT 5")
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                # Check if any values are stored as binary blobs (unoptimized)
-                for value in row:
-                    if isinstance(value, bytes):
-                        return False
-            
-            return True
+        cursor = self._read_connection().cursor()
+        
+        # Check if we have any fingerprints
+        cursor.execute("SELECT 1 FROM Fingerprints LIMIT 1")
+        if cursor.fetchone() is None:
+            return True  # Empty database is considered optimized
+        
+        # Sample a few records to check data types
+        cursor.execute("SELECT f_anchor, f_target, delta_t, t_anchor FROM Fingerprints LIMIT 5")
+        rows = cursor.fetchall()
+        
+        for row in rows:
+            # Check if any values are stored as binary blobs (unoptimized)
+            for value in row:
+                if isinstance(value, bytes):
+                    return False
+        
+        return True
     
     def optimize_database(self) -> Dict[str, any]:
         """
@@ -363,15 +807,29 @@ class DatabaseManager:
         # Get database size before optimization
         size_before = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
         
-        print("Starting database optimization...")
-        print("Converting binary fingerprint data to optimized integers...")
+        # Release the shared connections so nothing holds the file during VACUUM
+        self.close()
+        
+        logger.info("Starting database optimization...")
+        logger.info("Converting binary fingerprint data to optimized integers...")
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Get total count for progress tracking
-            cursor.execute("SELECT COUNT(*) FROM Fingerprints")
-            total_fingerprints = cursor.fetchone()[0]
+            # Wait for other connections to finish instead of failing with
+            # "database is locked", and let the WAL grow during the rewrite
+            # rather than checkpointing every 1000 pages
+            cursor.execute("PRAGMA busy_timeout=60000")
+            cursor.execute("PRAGMA wal_autocheckpoint=100000")
+            
+            # Count the rows and the rows holding binary data in one scan
+            cursor.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(typeof(f_anchor) = 'blob' OR typeof(f_target) = 'blob' OR
+                                    typeof(delta_t) = 'blob' OR typeof(t_anchor) = 'blob'), 0)
+                FROM Fingerprints
+            ''')
+            total_fingerprints, converted = cursor.fetchone()
             
             if total_fingerprints == 0:
                 return {
@@ -381,67 +839,59 @@ class DatabaseManager:
                     'size_after': size_before
                 }
             
-            print(f"Processing {total_fingerprints:,} fingerprints...")
-            
-            # Process in batches to avoid memory issues
-            batch_size = 10000
-            processed = 0
-            converted = 0
-            
-            cursor.execute("SELECT id, f_anchor, f_target, delta_t, t_anchor FROM Fingerprints")
-            
-            while True:
-                rows = cursor.fetchmany(batch_size)
-                if not rows:
-                    break
-                
-                updates = []
-                for fingerprint_id, f_anchor, f_target, delta_t, t_anchor in rows:
-                    needs_update = False
-                    new_values = []
-                    
-                    # Convert each field if it's binary data
-                    for value in [f_anchor, f_target, delta_t, t_anchor]:
-                        if isinstance(value, bytes):
-                            needs_update = True
-                            try:
-                                if len(value) >= 4:
-                                    converted_value = struct.unpack('<i', value[:4])[0]
-                                else:
-                                    converted_value = int.from_bytes(value, 'little')
-                            except (struct.error, ValueError):
-                                converted_value = 0  # Fallback for corrupted data
-                            new_values.append(int(converted_value))
-                        else:
-                            new_values.append(int(value))
-                    
-                    if needs_update:
-                        updates.append((new_values[0], new_values[1], new_values[2], new_values[3], fingerprint_id))
-                        converted += 1
-                
-                # Apply updates if any
-                if updates:
-                    cursor.executemany('''
-                        UPDATE Fingerprints 
-                        SET f_anchor=?, f_target=?, delta_t=?, t_anchor=? 
-                        WHERE id=?
-                    ''', updates)
-                
-                processed += len(rows)
-                
-                # Show progress every 100k records
-                if processed % 100000 == 0:
-                    progress = (processed / total_fingerprints) * 100
-                    print(f"Progress: {processed:,}/{total_fingerprints:,} ({progress:.1f}%) - Converted: {converted:,}")
+            logger.info("Processing %d fingerprints...", total_fingerprints)
+            
+            rebuilt_index = not self._has_covering_lookup_index(cursor)
+            if converted:
+                # Rebuild the table with one sequential INSERT ... SELECT rather
+                # than updating rows in place, then index the compact result once
+                logger.info("Rewriting fingerprint table (%d rows hold binary data)...", converted)
+                conn.create_function("legacy_to_int", 1, _legacy_to_int, deterministic=True)
+                # One write transaction covers the whole rebuild, so it either
+                # completes or leaves the original table untouched
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("DROP TABLE IF EXISTS Fingerprints_new")
+                cursor.execute("CREATE TABLE Fingerprints_new " + FINGERPRINTS_COLUMNS_SQL)
+                all_blobs = converted == total_fingerprints
+                columns = ', '.join(_legacy_column_sql(column, all_blobs)
+                                    for column in ('f_anchor', 'f_target', 'delta_t', 't_anchor'))
+                cursor.execute(f'''
+                    INSERT INTO Fingerprints_new (id, song_id, f_anchor, f_target, delta_t, t_anchor)
+                    SELECT id, song_id, {columns}
+                    FROM Fingerprints ORDER BY id
+                ''')
+                cursor.execute("DROP TABLE Fingerprints")
+                cursor.execute("ALTER TABLE Fingerprints_new RENAME TO Fingerprints")
+                cursor.execute(SONG_INDEX_SQL)
+                cursor.execute(LOOKUP_INDEX_SQL)
+                rebuilt_index = True
+            elif rebuilt_index:
+                # Replace a hash-only lookup index with the covering one
+                logger.info("Rebuilding fingerprint lookup index as a covering index...")
+                cursor.execute("DROP INDEX IF EXISTS idx_fingerprint_lookup")
+                cursor.execute(LOOKUP_INDEX_SQL)
+            
+            # Refresh the query planner statistics for the rebuilt indexes
+            if rebuilt_index:
+                cursor.execute("ANALYZE Fingerprints")
             
             # Commit all changes
             conn.commit()
             
             # Vacuum the database to reclaim space
-            print("Vacuuming database to reclaim space...")
+            logger.info("Vacuuming database to reclaim space...")
             cursor.execute("VACUUM")
             
-            print(f"Optimization complete! Converted {converted:,} fingerprints")
+            # Copy everything into the database file and empty the WAL, so the
+            # size reported below is the real one
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            cursor.execute("PRAGMA wal_autocheckpoint=1000")
+            
+            cursor.execute("PRAGMA optimize")
+            
+            logger.info("Optimization complete! Converted %d fingerprints", converted)
+        
+        self._needs_optimization = None
         
         # Get database size after optimization
         size_after = os.path.getsize(self.db_path)
@@ -452,6 +902,7 @@ class DatabaseManager:
             'optimized': True,
             'total_fingerprints': total_fingerprints,
             'converted_fingerprints': converted,
+            'rebuilt_lookup_index': rebuilt_index,
             'size_before': size_before,
             'size_after': size_after,
             'size_reduction': size_reduction,
@@ -470,16 +921,15 @@ class DatabaseManager:
         size_bytes = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
         size_mb = size_bytes / (1024 * 1024)
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get table sizes
-            cursor.execute("SELECT COUNT(*) FROM Songs")
-            song_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM Fingerprints")
-            fingerprint_count = cursor.fetchone()[0]
-            
+        cursor = self._read_connection().cursor()
+        
+        # Get table sizes
+        cursor.execute("SELECT COUNT(*) FROM Songs")
+        song_count = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT total_fingerprints FROM Stats")
+        fingerprint_count = cursor.fetchone()[0]
+        
         return {
             'size_bytes': size_bytes,
             'size_mb': size_mb,
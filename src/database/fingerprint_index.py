@@ -0,0 +1,202 @@
+"""
+In-memory fingerprint index for fast query matching.
+
+This module loads the Fingerprints table into sorted NumPy arrays so that
+a query can be matched with a handful of vectorized binary searches instead
+of one SQLite round trip per query hash.
+
+Author: Hocus Pocus Project
+Version: 1.0
+"""
+
+import os
+import tempfile
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Union
+from ..core.fingerprint_generator import as_fingerprint_array, pack_hashes
+
+
+class FingerprintIndex:
+    """
+    Read-only, hash-sorted snapshot of the Fingerprints table.
+
+    Fingerprints are held as three parallel arrays (packed hash, song ID,
+    anchor time) sorted by hash, so all database entries sharing a query
+    hash form one contiguous bucket located with np.searchsorted.
+    """
+
+    def __init__(self, hashes: np.ndarray, song_ids: np.ndarray, t_anchors: np.ndarray):
+        """
+        Initialize the index from unsorted fingerprint arrays.
+
+        Args:
+            hashes: Packed hash keys from pack_hashes()
+            song_ids: Song ID of each fingerprint
+            t_anchors: Anchor time index of each fingerprint
+        """
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.song_ids = song_ids[order]
+        self.t_anchors = t_anchors[order]
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @classmethod
+    def from_database(cls, db_manager, batch_size: int = 100000) -> 'FingerprintIndex':
+        """
+        Load every fingerprint from the database into a new index.
+
+        The table must hold integer fingerprints; databases still containing
+        legacy binary blobs should be optimized first.
+
+        Args:
+            db_manager: DatabaseManager to read fingerprints from
+            batch_size: Number of rows converted to NumPy per fetch
+
+        Returns:
+            FingerprintIndex covering the whole Fingerprints table
+        """
+        chunks = []
+        conn = db_manager.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT f_anchor, f_target, delta_t, song_id, t_anchor FROM Fingerprints")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.int64))
+        finally:
+            conn.close()
+
+        if chunks:
+            table = np.concatenate(chunks)
+        else:
+            table = np.empty((0, 5), dtype=np.int64)
+
+        return cls(pack_hashes(table[:, 0], table[:, 1], table[:, 2]),
+                   table[:, 3].astype(np.int32),
+                   table[:, 4].astype(np.int32))
+
+    @classmethod
+    def from_database_cached(cls, db_manager, cache_path: str) -> 'FingerprintIndex':
+        """
+        Load the index from a sidecar file, rebuilding it when the database changed.
+        
+        Reading the sorted arrays back with np.load replaces a full table
+        scan plus sort on every start-up. The file records the database's
+        fingerprint version and is rewritten whenever that no longer matches.
+        
+        Args:
+            db_manager: DatabaseManager to read fingerprints from
+            cache_path: Path of the .npz sidecar file
+            
+        Returns:
+            FingerprintIndex covering the whole Fingerprints table
+        """
+        version = np.array(db_manager.get_fingerprint_version(), dtype=np.int64)
+        try:
+            with np.load(cache_path) as cached:
+                if np.array_equal(cached['version'], version):
+                    index = cls.__new__(cls)
+                    index.hashes = cached['hashes']
+                    index.song_ids = cached['song_ids']
+                    index.t_anchors = cached['t_anchors']
+                    return index
+        except (OSError, KeyError, ValueError):
+            pass
+        
+        index = cls.from_database(db_manager)
+        try:
+            index._save(cache_path, version)
+        except OSError:
+            pass  # A missing sidecar only costs the next start-up a rebuild
+        return index
+    
+    def _save(self, cache_path: str, version: np.ndarray) -> None:
+        """Write the sorted arrays to cache_path, replacing it atomically."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)),
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                np.savez(temp_file, version=version, hashes=self.hashes,
+                         song_ids=self.song_ids, t_anchors=self.t_anchors)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def match(self, fingerprints_query: Union[np.ndarray, List[Tuple[Tuple[int, int, int], int]]]
+              ) -> Tuple[Optional[int], Dict]:
+        """
+        Match query fingerprints against the index.
+
+        Produces the same result as DatabaseManager.match_query().
+
+        Args:
+            fingerprints_query: FINGERPRINT_DTYPE array, or a list of
+                               ((f_anchor, f_target, delta_t), t_anchor_query) tuples
+
+        Returns:
+            Tuple of (best_song_id, scores_dict) where scores_dict maps
+            (song_id, offset) to the number of matching fingerprints
+        """
+        if len(fingerprints_query) == 0 or len(self.hashes) == 0:
+            return None, {}
+
+        query = as_fingerprint_array(fingerprints_query)
+        query_hashes = pack_hashes(query['f_anchor'], query['f_target'], query['delta_t'])
+
+        # Locate the bucket of database entries for every query hash
+        bucket_starts = np.searchsorted(self.hashes, query_hashes, side='left')
+        bucket_sizes = np.searchsorted(self.hashes, query_hashes, side='right') - bucket_starts
+        total_matches = int(bucket_sizes.sum())
+        if total_matches == 0:
+            return None, {}
+
+        # Expand the buckets into one flat list of (query row, index row) pairs
+        query_rows = np.repeat(np.arange(len(query)), bucket_sizes)
+        first_pair = np.cumsum(bucket_sizes) - bucket_sizes
+        index_rows = (np.arange(total_matches) - np.repeat(first_pair, bucket_sizes) +
+                      np.repeat(bucket_starts, bucket_sizes))
+
+        song_ids = self.song_ids[index_rows].astype(np.int64)
+        offsets = self.t_anchors[index_rows].astype(np.int64) - query['t_anchor'][query_rows]
+        pair_songs, pair_offsets, counts = self._count_pairs(song_ids, offsets)
+        
+        scores = dict(zip(zip(pair_songs.tolist(), pair_offsets.tolist()), counts.tolist()))
+        best_song_id = int(pair_songs[np.argmax(counts)])
+        return best_song_id, scores
+    
+    @staticmethod
+    def _count_pairs(song_ids: np.ndarray, offsets: np.ndarray
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Count the occurrences of each (song_id, offset) pair.
+        
+        Pairs are packed into one int64 key relative to the smallest song ID
+        and offset. When the key range is small compared to the number of
+        matches, the usual case for small or single-song databases, the
+        counts come from a single np.bincount pass instead of a sort.
+        
+        Args:
+            song_ids: Song ID of every match
+            offsets: Time offset of every match
+            
+        Returns:
+            Tuple of (song_ids, offsets, counts) arrays for the distinct pairs,
+            ordered by song ID, then offset
+        """
+        min_song, min_offset = song_ids.min(), offsets.min()
+        offset_span = offsets.max() - min_offset + 1
+        keys = (song_ids - min_song) * offset_span + (offsets - min_offset)
+        key_span = int((song_ids.max() - min_song + 1) * offset_span)
+        
+        if key_span <= max(4 * len(keys), 1 << 16):
+            histogram = np.bincount(keys, minlength=key_span)
+            keys = np.flatnonzero(histogram)
+            counts = histogram[keys]
+        else:
+            keys, counts = np.unique(keys, return_counts=True)
+        return keys // offset_span + min_song, keys % offset_span + min_offset, counts
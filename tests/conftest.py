@@ -0,0 +1,8 @@
+"""
+Shared pytest configuration: makes the ``src`` package importable from the repository root.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
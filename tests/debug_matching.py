@@ -6,9 +6,7 @@ This script helps debug why songs aren't matching after database optimization
 by analyzing the fingerprint generation and matching process step by step.
 """
 
-import sqlite3
 from ..src.core.engine import Engine
-import struct
 
 def debug_fingerprint_matching():
     """Debug the fingerprint matching process."""
@@ -19,35 +17,26 @@ def debug_fingerprint_matching():
     # Initialize Shazam engine
     shazam = Engine()
     
+    # All database access goes through the engine's manager (and its shared connection)
+    dbm = shazam.db_manager
+    
     # Step 1: Test with a known song from the database
     print("\n📋 Step 1: Get a sample song from database")
-    conn = sqlite3.connect("shazam_clone.db")
-    cursor = conn.cursor()
     
     # Get first song info
-    cursor.execute("SELECT song_id, title, file_path FROM Songs LIMIT 1")
-    song_info = cursor.fetchone()
-    song_id, title, file_path = song_info
+    song_info = min(dbm.list_songs(), key=lambda song: song['song_id'])
+    song_id, title, file_path = song_info['song_id'], song_info['title'], song_info['file_path']
     print(f"   🎵 Testing with: {title} (ID: {song_id})")
     print(f"   📁 File: {file_path}")
     
     # Step 2: Get some fingerprints from database for this song
     print(f"\n📋 Step 2: Sample fingerprints from database for song {song_id}")
-    cursor.execute("""
-        SELECT f_anchor, f_target, delta_t, t_anchor 
-        FROM Fingerprints 
-        WHERE song_id = ? 
-        LIMIT 5
-    """, (song_id,))
-    
-    db_fingerprints = cursor.fetchall()
+    db_fingerprints = dbm.sample_fingerprints(song_id, 5)
     print(f"   📊 Found {len(db_fingerprints)} sample fingerprints:")
     for i, (f_anchor, f_target, delta_t, t_anchor) in enumerate(db_fingerprints):
         print(f"      {i+1}: f_anchor={f_anchor} ({type(f_anchor)}), f_target={f_target} ({type(f_target)})")
         print(f"         delta_t={delta_t} ({type(delta_t)}), t_anchor={t_anchor} ({type(t_anchor)})")
     
-    conn.close()
-    
     # Step 3: Process the same song file to generate fingerprints
     print(f"\n📋 Step 3: Generate fingerprints from the same audio file")
     try:
@@ -57,9 +46,7 @@ def debug_fingerprint_matching():
         
         # Show sample generated fingerprints
         print(f"   📄 Sample generated fingerprints:")
-        for i, fp in enumerate(generated_fingerprints[:5]):
-            hash_fp, t_anchor = fp
-            f_anchor, f_target, delta_t = hash_fp
+        for i, (f_anchor, f_target, delta_t, t_anchor) in enumerate(generated_fingerprints[:5]):
             print(f"      {i+1}: f_anchor={f_anchor} ({type(f_anchor)}), f_target={f_target} ({type(f_target)})")
             print(f"         delta_t={delta_t} ({type(delta_t)}), t_anchor={t_anchor} ({type(t_anchor)})")
             
@@ -74,31 +61,19 @@ def debug_fingerprint_matching():
     test_fingerprints = generated_fingerprints[:10]
     print(f"   🔍 Testing with {len(test_fingerprints)} fingerprints...")
     
-    conn = sqlite3.connect("shazam_clone.db")
-    cursor = conn.cursor()
-    
     matches_found = 0
-    for i, (hash_fp, t_anchor_query) in enumerate(test_fingerprints):
-        f_anchor, f_target, delta_t = hash_fp
-        
-        cursor.execute('''
-            SELECT song_id, t_anchor 
-            FROM Fingerprints
-            WHERE f_anchor=? AND f_target=? AND delta_t=?
-        ''', (f_anchor, f_target, delta_t))
-        
-        matches = cursor.fetchall()
-        if matches:
+    for i, (f_anchor, f_target, delta_t, t_anchor_query) in enumerate(test_fingerprints.tolist()):
+        # Scores map (song_id, t_anchor_db - t_anchor_query) to match counts
+        _, scores = dbm.match_query(test_fingerprints[i:i + 1])
+        if scores:
             matches_found += 1
-            print(f"      ✅ Fingerprint {i+1}: Found {len(matches)} matches")
-            for song_match_id, t_anchor_db in matches[:3]:  # Show first 3 matches
-                print(f"         Song {song_match_id}: t_anchor_db={t_anchor_db}, t_anchor_query={t_anchor_query}")
+            print(f"      ✅ Fingerprint {i+1}: Found {sum(scores.values())} matches")
+            for song_match_id, offset in list(scores)[:3]:  # Show first 3 matches
+                print(f"         Song {song_match_id}: t_anchor_db={t_anchor_query + offset}, t_anchor_query={t_anchor_query}")
         else:
             print(f"      ❌ Fingerprint {i+1}: No matches found")
             print(f"         Looking for: f_anchor={f_anchor}, f_target={f_target}, delta_t={delta_t}")
     
-    conn.close()
-    
     print(f"\n   📊 Direct matching results: {matches_found}/{len(test_fingerprints)} fingerprints found matches")
     
     # Step 5: Test full identification
@@ -130,25 +105,16 @@ def debug_fingerprint_matching():
     
     # Step 6: Check database statistics
     print(f"\n📋 Step 6: Database statistics")
-    conn = sqlite3.connect("shazam_clone.db")
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM Fingerprints")
-    total_fingerprints = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT song_id) FROM Fingerprints")
-    songs_with_fingerprints = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT song_id, COUNT(*) FROM Fingerprints GROUP BY song_id ORDER BY COUNT(*) DESC LIMIT 5")
-    top_songs = cursor.fetchall()
+    total_fingerprints = dbm.get_database_size_info()['fingerprint_count']
+    song_counts = dbm.top_songs_by_fingerprint_count()
+    songs_with_fingerprints = len(song_counts)
+    top_songs = song_counts[:5]
     
     print(f"   📊 Total fingerprints: {total_fingerprints:,}")
     print(f"   📊 Songs with fingerprints: {songs_with_fingerprints}")
     print(f"   📊 Top songs by fingerprint count:")
     for song_id, count in top_songs:
         print(f"      Song {song_id}: {count:,} fingerprints")
-    
-    conn.close()
 
 if __name__ == "__main__":
     debug_fingerprint_matching()
@@ -0,0 +1,114 @@
+"""
+Tests for the database manager and the in-memory fingerprint index.
+"""
+
+import numpy as np
+import pytest
+
+from src.core.fingerprint_generator import FINGERPRINT_DTYPE
+from src.database.database_manager import DatabaseManager
+from src.database.fingerprint_index import FingerprintIndex
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "test.db"))
+    yield manager
+    manager.close()
+
+
+def _random_fingerprints(rng, count, max_time):
+    fingerprints = np.empty(count, dtype=FINGERPRINT_DTYPE)
+    fingerprints['f_anchor'] = rng.integers(0, 60, count)
+    fingerprints['f_target'] = rng.integers(0, 60, count)
+    fingerprints['delta_t'] = rng.integers(1, 21, count)
+    fingerprints['t_anchor'] = rng.integers(0, max_time, count)
+    return fingerprints
+
+
+def _stored_song(db_manager, title, fingerprints):
+    """Store a song the way Engine.store_song() does."""
+    with db_manager.bulk_transaction():
+        song_id = db_manager.add_song(title)
+        db_manager.add_fingerprints(song_id, fingerprints)
+    return song_id
+
+
+def _count_rows(db_manager, table):
+    conn = db_manager.get_connection()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_stats_counter_matches_row_count(db_manager):
+    rng = np.random.default_rng(1)
+
+    db_manager.add_fingerprints(db_manager.add_song("single"), _random_fingerprints(rng, 150, 500))
+    assert db_manager.get_fingerprint_count() == _count_rows(db_manager, "Fingerprints") == 150
+
+    with db_manager.bulk_transaction():
+        for i in range(3):
+            _stored_song(db_manager, f"song {i}", _random_fingerprints(rng, 1000, 500))
+        db_manager.commit_bulk_transaction()
+
+        # A song failing after its fingerprints were written is rolled back on its own
+        with pytest.raises(RuntimeError):
+            with db_manager.bulk_transaction():
+                db_manager.add_fingerprints(db_manager.add_song("failed"), _random_fingerprints(rng, 700, 500))
+                raise RuntimeError("store failed")
+
+        _stored_song(db_manager, "after failure", _random_fingerprints(rng, 250, 500))
+
+    assert db_manager.get_fingerprint_count() == _count_rows(db_manager, "Fingerprints") == 3400
+    assert _count_rows(db_manager, "Songs") == 5
+
+
+def test_stats_counter_after_failed_bulk_transaction(db_manager):
+    rng = np.random.default_rng(2)
+    _stored_song(db_manager, "kept", _random_fingerprints(rng, 300, 500))
+
+    with pytest.raises(RuntimeError):
+        with db_manager.bulk_transaction():
+            _stored_song(db_manager, "lost", _random_fingerprints(rng, 400, 500))
+            raise RuntimeError("upload interrupted")
+
+    assert db_manager.get_fingerprint_count() == _count_rows(db_manager, "Fingerprints") == 300
+
+
+def test_index_match_equals_match_query(db_manager):
+    rng = np.random.default_rng(3)
+    songs = [_random_fingerprints(rng, 5000, 2000) for _ in range(6)]
+    for i, fingerprints in enumerate(songs):
+        _stored_song(db_manager, f"song {i}", fingerprints)
+
+    # An excerpt of the third song (ID 3) shifted in time, mixed with unrelated fingerprints
+    excerpt = songs[2][:800].copy()
+    excerpt['t_anchor'] += 37
+    query = np.concatenate([excerpt, _random_fingerprints(rng, 500, 2000)])
+
+    index = FingerprintIndex.from_database(db_manager)
+    assert len(index) == 30000
+
+    best_song_id, scores = db_manager.match_query(query)
+    index_song_id, index_scores = index.match(query)
+    assert best_song_id == 3
+    assert index_song_id == best_song_id
+    assert dict(index_scores) == dict(scores)
+
+    # List-form queries score the same as arrays
+    query_list = [((f_anchor, f_target, delta_t), t_anchor)
+                  for f_anchor, f_target, delta_t, t_anchor in query.tolist()]
+    assert dict(index.match(query_list)[1]) == dict(scores)
+
+
+def test_index_match_without_results(db_manager):
+    rng = np.random.default_rng(4)
+    _stored_song(db_manager, "only", _random_fingerprints(rng, 100, 100))
+    index = FingerprintIndex.from_database(db_manager)
+
+    assert index.match(np.empty(0, dtype=FINGERPRINT_DTYPE)) == (None, {})
+    unmatched = _random_fingerprints(rng, 10, 100)
+    unmatched['delta_t'] = 100
+    assert index.match(unmatched) == db_manager.match_query(unmatched) == (None, {})
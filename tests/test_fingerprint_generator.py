@@ -0,0 +1,62 @@
+"""
+Tests for the array-based fingerprint generator.
+
+The structured-array output must contain exactly the pairs that the original
+list-based constellation mapping produced, in the same order.
+"""
+
+import numpy as np
+import pytest
+
+from src.core.fingerprint_generator import FingerprintGenerator
+
+
+def _reference_fingerprints(peaks, fan_value, target_zone):
+    """Original list-based implementation of generate_fingerprints()."""
+    if not peaks:
+        return []
+
+    sorted_peaks = sorted(peaks, key=lambda peak: peak[0])
+    fingerprints = []
+
+    for i, (t_anchor, f_anchor) in enumerate(sorted_peaks):
+        for j in range(1, min(fan_value + 1, len(sorted_peaks) - i)):
+            t_target, f_target = sorted_peaks[i + j]
+            delta_t = t_target - t_anchor
+            if target_zone[0] <= delta_t <= target_zone[1]:
+                fingerprints.append(((f_anchor, f_target, delta_t), t_anchor))
+
+    return fingerprints
+
+
+def _as_tuples(fingerprints):
+    return [((f_anchor, f_target, delta_t), t_anchor)
+            for f_anchor, f_target, delta_t, t_anchor in fingerprints.tolist()]
+
+
+@pytest.mark.parametrize("num_peaks", [0, 1, 2, 7, 50, FingerprintGenerator.COMPILED_MIN_PEAKS, 5000])
+@pytest.mark.parametrize("fan_value, target_zone", [(5, (1, 20)), (3, (0, 5)), (10, (2, 3)), (1, (1, 20))])
+def test_generate_fingerprints_matches_list_implementation(num_peaks, fan_value, target_zone):
+    rng = np.random.default_rng(num_peaks * 31 + fan_value)
+    # Few distinct times, so that many peaks share a time index
+    times = rng.integers(0, num_peaks // 3 + 2, num_peaks)
+    freqs = rng.integers(0, 1025, num_peaks)
+    peaks = list(zip(times.tolist(), freqs.tolist()))
+
+    generator = FingerprintGenerator(fan_value, target_zone)
+    expected = _reference_fingerprints(peaks, fan_value, target_zone)
+
+    assert _as_tuples(generator.generate_fingerprints(peaks)) == expected
+    assert _as_tuples(generator.generate_fingerprints(np.array(peaks, dtype=np.int32))) == expected
+
+
+def test_generate_fingerprints_presorted_peaks():
+    rng = np.random.default_rng(7)
+    peaks = np.stack([rng.integers(0, 400, 1000), rng.integers(0, 1025, 1000)], axis=1).astype(np.int32)
+    peaks = peaks[np.argsort(peaks[:, 0], kind='stable')]
+
+    generator = FingerprintGenerator()
+    expected = _reference_fingerprints([tuple(peak) for peak in peaks.tolist()],
+                                       generator.fan_value, generator.target_zone)
+
+    assert _as_tuples(generator.generate_fingerprints(peaks, sorted_by_time=True)) == expected
@@ -0,0 +1,87 @@
+"""
+Tests for content-hash deduplication in folder uploads.
+
+Audio decoding is replaced by a stand-in for Engine.extract_fingerprints_parallel()
+so that the tests only exercise the upload bookkeeping.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import src.cli.folder_upload as folder_upload
+from src.core.engine import Engine
+from src.core.fingerprint_generator import FINGERPRINT_DTYPE
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(folder_upload, "check_and_optimize_database", lambda shazam_engine: None)
+    shazam_engine = Engine(db_path=str(tmp_path / "test.db"))
+    yield shazam_engine
+    shazam_engine.db_manager.close()
+
+
+def _fake_extraction(failing_paths=()):
+    """Stand-in for extract_fingerprints_parallel() deriving fingerprints from file contents."""
+    def extract(file_paths, *args, **kwargs):
+        for file_path in file_paths:
+            if file_path in failing_paths:
+                yield file_path, None, None, "decode failed"
+                continue
+            with open(file_path, "rb") as f:
+                seed = sum(f.read())
+            rng = np.random.default_rng(seed)
+            fingerprints = np.zeros(50, dtype=FINGERPRINT_DTYPE)
+            fingerprints['f_anchor'] = rng.integers(0, 1000, 50)
+            fingerprints['delta_t'] = 1
+            fingerprints['t_anchor'] = np.arange(50)
+            yield file_path, 1.0, fingerprints, None
+    return extract
+
+
+def _write_files(folder, contents):
+    paths = []
+    for name, data in contents:
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def test_reupload_skips_known_files(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "extract_fingerprints_parallel", _fake_extraction())
+    folder = str(tmp_path)
+    files = _write_files(folder, [("a.mp3", b"first song"), ("b.mp3", b"second song"),
+                                  ("copy of a.mp3", b"first song")])
+
+    result = folder_upload.execute_bulk_upload(engine, files, folder)
+    assert result == {'songs_added': 2, 'fingerprints_added': 100}
+    assert len(engine.db_manager.list_songs()) == 2
+
+    # Nothing new the second time round
+    assert folder_upload.execute_bulk_upload(engine, files, folder) is None
+    assert len(engine.db_manager.list_songs()) == 2
+    assert engine.db_manager.get_fingerprint_count() == 100
+
+
+def test_copy_is_stored_when_first_copy_fails(engine, tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    files = _write_files(folder, [("a.mp3", b"same song"), ("b.mp3", b"same song")])
+    monkeypatch.setattr(engine, "extract_fingerprints_parallel", _fake_extraction({files[0]}))
+
+    result = folder_upload.execute_bulk_upload(engine, files, folder)
+    assert result == {'songs_added': 1, 'fingerprints_added': 50}
+    assert [song['title'] for song in engine.db_manager.list_songs()] == ["b"]
+
+
+def test_unhashable_files_are_not_duplicates(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "extract_fingerprints_parallel", _fake_extraction())
+    monkeypatch.setattr(folder_upload, "_try_compute_file_hash", lambda file_path: None)
+    folder = str(tmp_path)
+    files = _write_files(folder, [("a.mp3", b"first song"), ("b.mp3", b"second song")])
+
+    result = folder_upload.execute_bulk_upload(engine, files, folder)
+    assert result == {'songs_added': 2, 'fingerprints_added': 100}
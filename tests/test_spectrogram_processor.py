@@ -0,0 +1,36 @@
+"""
+Tests for the spectrogram peak-detection helpers.
+
+The NumPy running-maximum fallback used without SciPy must reproduce
+scipy.ndimage.maximum_filter as called by SpectrogramProcessor.maximum_filter.
+"""
+
+import numpy as np
+import pytest
+
+import src.audio.spectrogram_processor as spectrogram_processor
+from src.audio.spectrogram_processor import SpectrogramProcessor
+
+ndimage = pytest.importorskip("scipy.ndimage")
+
+
+@pytest.mark.parametrize("shape", [(1025, 300), (40, 30), (5, 3), (1, 1)])
+@pytest.mark.parametrize("filter_size", [(20, 20), (3, 5), (4, 7), (1, 1), (2, 1)])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_running_max_fallback_matches_scipy(monkeypatch, shape, filter_size, dtype):
+    rng = np.random.default_rng(sum(shape) + sum(filter_size))
+    array = (rng.standard_normal(shape) * 40 - 60).astype(dtype)
+
+    expected = SpectrogramProcessor.maximum_filter(array, filter_size)
+
+    monkeypatch.setattr(spectrogram_processor, "ndimage", None)
+    result = SpectrogramProcessor.maximum_filter(array, filter_size)
+
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_scipy_path_is_maximum_filter():
+    array = np.arange(12, dtype=np.float64).reshape(3, 4)
+    np.testing.assert_array_equal(SpectrogramProcessor.maximum_filter(array, (3, 3)),
+                                  ndimage.maximum_filter(array, size=(3, 3), mode='nearest'))
@@ -6,11 +6,86 @@ This script analyzes the structure and size of the Shazam clone database
 to identify optimization opportunities and understand storage usage.
 """
 
-import sqlite3
+import contextlib
+import io
+import json
 import os
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Tuple
+
+def get_object_stats(cursor: sqlite3.Cursor) -> Optional[Dict[str, Tuple[int, int]]]:
+    """
+    Get the size and entry count of every table and index from dbstat.
+    
+    Returns:
+        Dictionary mapping object name to (bytes, leaf entries), where leaf
+        entries equal the row count for tables, or None if SQLite was built
+        without the dbstat virtual table
+    """
+    try:
+        cursor.execute("""
+            SELECT name, SUM(pgsize), SUM(CASE WHEN pagetype = 'leaf' THEN ncell ELSE 0 END)
+            FROM dbstat GROUP BY name
+        """)
+    except sqlite3.OperationalError:
+        return None
+    return {name: (size, entries) for name, size, entries in cursor.fetchall()}
+
+def file_identity(db_path: str) -> List:
+    """
+    Identify the current contents of a database by file size and mtime.
+    
+    Every committed write changes the database file or, in WAL mode, its
+    -wal file, so both are included.
+    """
+    identity = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            identity.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            identity.append(None)
+    return [os.path.abspath(db_path), identity]
+
+def load_cached_report(cache_path: str, identity: List) -> Optional[str]:
+    """Return the cached report if it was produced for this database state."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cached = json.load(cache_file)
+        cached_identity, report = cached["identity"], cached["report"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if cached_identity != identity or not isinstance(report, str):
+        return None
+    return report
+
+def save_cached_report(cache_path: str, identity: List, report: str) -> None:
+    """Store the report for reuse while the database is unchanged."""
+    try:
+        with open(cache_path, "w", encoding="utf-8") as cache_file:
+            json.dump({"identity": identity, "report": report}, cache_file)
+    except OSError:
+        pass  # Caching is best effort
+
+class _Tee(io.StringIO):
+    """Text buffer that also forwards everything written to another stream."""
+    
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+    
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        return super().write(text)
 
 def analyze_database():
-    """Analyze the database structure and provide optimization recommendations."""
+    """
+    Analyze the database structure and provide optimization recommendations.
+    
+    The report is cached in .analyze_cache.json next to the database and
+    printed from there while the database files are unchanged.
+    """
     
     db_path = "shazam_clone.db"
     
@@ -19,6 +94,28 @@ def analyze_database():
         print(f"❌ Database file '{db_path}' not found!")
         return
     
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), ".analyze_cache.json")
+    report = load_cached_report(cache_path, file_identity(db_path))
+    if report is not None:
+        print(report, end="")
+        return
+    
+    report = _Tee(sys.stdout)
+    with contextlib.redirect_stdout(report):
+        succeeded = run_analysis(db_path)
+    
+    # Identify the database after the connection closed, since closing the
+    # last connection to a WAL database checkpoints and removes the -wal file
+    if succeeded:
+        save_cached_report(cache_path, file_identity(db_path), report.getvalue())
+
+def run_analysis(db_path: str) -> bool:
+    """
+    Print the analysis report for a database.
+    
+    Returns:
+        True if the analysis completed without errors
+    """
     # Get database file size
     db_size_mb = os.path.getsize(db_path) / (1024 * 1024)
     print(f"📊 Database file size: {db_size_mb:.2f} MB")
@@ -27,7 +124,16 @@ def analyze_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # Same cache settings as the application's DatabaseManager connections,
+    # so the row counts below scan through the memory map
+    cursor.execute("PRAGMA mmap_size=1073741824")
+    cursor.execute("PRAGMA cache_size=-65536")
+    
     try:
+        # Exact bytes and row counts per table and index from the dbstat
+        # virtual table, gathered in one pass over the file's pages
+        object_stats = get_object_stats(cursor)
+        
         # Get all tables
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = cursor.fetchall()
@@ -36,8 +142,11 @@ def analyze_database():
         total_rows = 0
         for table_name, in tables:
             # Get row count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
+            if object_stats is not None:
+                table_bytes, row_count = object_stats.get(table_name, (0, 0))
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                row_count = cursor.fetchone()[0]
             total_rows += row_count
             
             # Get table schema
@@ -46,6 +155,9 @@ def analyze_database():
             
             print(f"\n🔍 Table: {table_name}")
             print(f"   📊 Rows: {row_count:,}")
+            if object_stats is not None:
+                print(f"   💾 Size: {table_bytes / (1024 * 1024):.2f} MB"
+                      + (f" ({table_bytes / row_count:.1f} bytes/row)" if row_count else ""))
             print(f"   📋 Schema:")
             for column in schema:
                 col_id, name, data_type, not_null, default, pk = column
@@ -60,7 +172,8 @@ def analyze_database():
                     print(f"      Row {i+1}: {sample}")
         
         print(f"\n📊 Total rows across all tables: {total_rows:,}")
-        print(f"📐 Average size per row: {(db_size_mb * 1024 * 1024) / total_rows:.2f} bytes")
+        if total_rows:
+            print(f"📐 Average size per row: {(db_size_mb * 1024 * 1024) / total_rows:.2f} bytes")
         
         # Check for indices
         print(f"\n🔍 Database indices:")
@@ -70,6 +183,9 @@ def analyze_database():
             if index_name.startswith('sqlite_'):
                 continue  # Skip system indices
             print(f"   📌 {index_name} on {table_name}")
+            if object_stats is not None:
+                index_bytes = object_stats.get(index_name, (0, 0))[0]
+                print(f"      Size: {index_bytes / (1024 * 1024):.2f} MB")
             print(f"      SQL: {sql}")
         
         # Analyze database statistics
@@ -95,8 +211,10 @@ def analyze_database():
         
     except Exception as e:
         print(f"❌ Error analyzing database: {e}")
+        return False
     finally:
         conn.close()
+    return True
 
 if __name__ == "__main__":
     analyze_database()
@@ -15,9 +15,40 @@ variable-length integers, causing massive space inefficiency.
 import sqlite3
 import os
 import shutil
-from typing import Tuple
+import sys
+from typing import Optional, Tuple
 import struct
 
+# Index definitions are shared with the application, so a database optimized
+# here is not flagged for another index rebuild when the app opens it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.database.database_manager import LOOKUP_INDEX_SQL, SONG_INDEX_SQL
+
+_unpack_uint64 = struct.Struct('<Q').unpack
+
+def blob_to_int(value):
+    """Decode an 8-byte little-endian blob to an integer (None if malformed)."""
+    if isinstance(value, bytes):
+        try:
+            return _unpack_uint64(value)[0]
+        except struct.error:
+            return None
+    return value  # Already an integer
+
+def stored_fingerprint_total(cursor: sqlite3.Cursor) -> Optional[int]:
+    """
+    Read the fingerprint total kept by the application in its Stats table.
+    
+    Avoids a COUNT(*) scan of the whole Fingerprints table; returns None for
+    databases created before the Stats table existed.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='Stats'")
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute("SELECT total_fingerprints FROM Stats")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
 def backup_database(db_path: str) -> str:
     """Create a backup of the original database."""
     backup_path = f"{db_path}.backup"
@@ -66,10 +97,25 @@ def optimize_database(db_path: str) -> Tuple[float, float]:
     original_size = os.path.getsize(db_path) / (1024 * 1024)
     print(f"📊 Original size: {original_size:.2f} MB")
     
-    conn = sqlite3.connect(db_path)
+    # Autocommit mode: the migration below manages its own transaction.
+    # Wait up to a minute for other connections instead of failing at once.
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=60)
     cursor = conn.cursor()
     
+    # In WAL mode, let the log grow during the migration rather than
+    # checkpointing every 1000 pages
+    cursor.execute("PRAGMA wal_autocheckpoint=100000")
+    
+    # Same cache settings as the application's DatabaseManager connections
+    cursor.execute("PRAGMA mmap_size=1073741824")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    
     try:
+        # Load the new table and build its indices in one transaction, so the
+        # journal is synced once at the end instead of after every batch
+        cursor.execute("BEGIN")
+        
         # Step 1: Create a new optimized fingerprints table
         print("🔨 Creating optimized fingerprints table...")
         cursor.execute("""
@@ -86,60 +132,23 @@ def optimize_database(db_path: str) -> Tuple[float, float]:
         
         # Step 2: Convert and copy data
         print("🔄 Converting binary data to integers...")
-        cursor.execute("SELECT COUNT(*) FROM Fingerprints")
-        total_rows = cursor.fetchone()[0]
-        print(f"📊 Processing {total_rows:,} fingerprint records...")
-        
-        # Process in batches to avoid memory issues
-        batch_size = 10000
-        processed = 0
-        
-        cursor.execute("SELECT id, song_id, f_anchor, f_target, delta_t, t_anchor FROM Fingerprints")
-        
-        insert_cursor = conn.cursor()
-        batch_data = []
-        
-        for row in cursor:
-            row_id, song_id, f_anchor, f_target, delta_t, t_anchor = row
-            
-            try:
-                # Convert binary data to integers
-                if isinstance(f_anchor, bytes):
-                    f_anchor_int = struct.unpack('<Q', f_anchor)[0]
-                    f_target_int = struct.unpack('<Q', f_target)[0] 
-                    delta_t_int = struct.unpack('<Q', delta_t)[0]
-                    t_anchor_int = struct.unpack('<Q', t_anchor)[0]
-                else:
-                    # Already integers
-                    f_anchor_int = f_anchor
-                    f_target_int = f_target
-                    delta_t_int = delta_t
-                    t_anchor_int = t_anchor
-                
-                batch_data.append((song_id, f_anchor_int, f_target_int, delta_t_int, t_anchor_int))
-                
-                if len(batch_data) >= batch_size:
-                    insert_cursor.executemany(
-                        "INSERT INTO Fingerprints_Optimized (song_id, f_anchor, f_target, delta_t, t_anchor) VALUES (?, ?, ?, ?, ?)",
-                        batch_data
-                    )
-                    conn.commit()
-                    processed += len(batch_data)
-                    batch_data = []
-                    print(f"   ✅ Processed {processed:,}/{total_rows:,} records ({(processed/total_rows)*100:.1f}%)")
-                    
-            except Exception as e:
-                print(f"   ❌ Error processing row {row_id}: {e}")
-                continue
+        total_rows = stored_fingerprint_total(cursor)
+        if total_rows is not None:
+            print(f"📊 Processing {total_rows:,} fingerprint records...")
         
-        # Insert remaining batch
-        if batch_data:
-            insert_cursor.executemany(
-                "INSERT INTO Fingerprints_Optimized (song_id, f_anchor, f_target, delta_t, t_anchor) VALUES (?, ?, ?, ?, ?)",
-                batch_data
-            )
-            conn.commit()
-            processed += len(batch_data)
+        # Convert inside SQLite in one INSERT ... SELECT instead of fetching
+        # every row into Python and inserting it back; rows whose blobs fail
+        # to decode come out NULL and are skipped by OR IGNORE
+        conn.create_function("blob_to_int", 1, blob_to_int, deterministic=True)
+        cursor.execute("""
+            INSERT OR IGNORE INTO Fingerprints_Optimized (song_id, f_anchor, f_target, delta_t, t_anchor)
+            SELECT song_id, blob_to_int(f_anchor), blob_to_int(f_target),
+                   blob_to_int(delta_t), blob_to_int(t_anchor)
+            FROM Fingerprints ORDER BY id
+        """)
+        processed = cursor.rowcount
+        if total_rows is not None and processed < total_rows:
+            print(f"   ❌ Skipped {total_rows - processed:,} records with undecodable data")
         
         print(f"✅ Converted {processed:,} fingerprint records")
         
@@ -147,36 +156,45 @@ def optimize_database(db_path: str) -> Tuple[float, float]:
         print("🔄 Replacing old table with optimized version...")
         cursor.execute("DROP TABLE Fingerprints")
         cursor.execute("ALTER TABLE Fingerprints_Optimized RENAME TO Fingerprints")
+        # Rows that failed to convert were dropped; the stored total is
+        # recounted the next time the application opens the database
+        cursor.execute("DROP TABLE IF EXISTS Stats")
         
         # Step 4: Recreate indices (but remove duplicates)
         print("🔨 Creating optimized indices...")
         
-        # Primary index for matching
-        cursor.execute("""
-            CREATE INDEX idx_fingerprint_lookup 
-            ON Fingerprints (f_anchor, f_target, delta_t)
-        """)
+        # Primary index for matching, covering song_id and t_anchor
+        cursor.execute(LOOKUP_INDEX_SQL)
         
         # Index for song-based queries
-        cursor.execute("""
-            CREATE INDEX idx_song_fingerprints 
-            ON Fingerprints (song_id)
-        """)
+        cursor.execute(SONG_INDEX_SQL)
         
-        # Step 5: Vacuum database to reclaim space
-        print("🧹 Vacuuming database to reclaim space...")
-        cursor.execute("VACUUM")
+        # Gather planner statistics for the new indices
+        cursor.execute("ANALYZE")
         
-        conn.commit()
-        print("✅ Database optimization completed!")
+        cursor.execute("COMMIT")
         
     except Exception as e:
         print(f"❌ Error during optimization: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         raise
     finally:
         conn.close()
     
+    # Step 5: Vacuum database to reclaim space (needs a connection without
+    # an open transaction)
+    print("🧹 Vacuuming database to reclaim space...")
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=60)
+    try:
+        conn.execute("VACUUM")
+        # Copy a WAL back into the database file so the size below is real
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    print("✅ Database optimization completed!")
+    
     # Get new size
     new_size = os.path.getsize(db_path) / (1024 * 1024)
     space_saved = original_size - new_size